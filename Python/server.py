@@ -5,79 +5,213 @@ Speech-to-text transcription using OpenAI Whisper with desktop settings app.
 """
 
 import os
-import tempfile
+import asyncio
+import gzip
+import hashlib
+import io
 import logging
-import json
+import queue
 import threading
 import subprocess
 import sys
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from itertools import chain
 from pathlib import Path
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+import blake3
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+import orjson
 import torch
 import whisper
 import uvicorn
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import av  # PyAV: decode uploads in-process instead of through an ffmpeg subprocess
+except ImportError:
+    av = None
+
+# Configure logging: WARNING for libraries; the server's own start-up and
+# model loading messages stay at INFO, per-request messages are DEBUG
+logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Let FP32 matmuls that remain (e.g. CPU fallbacks, mel filters) use TF32
+torch.set_float32_matmul_precision("high")
+
+try:
+    from torch.nn.attention import SDPBackend, sdpa_kernel
+    
+    def fast_attention():
+        """Restrict scaled-dot-product attention to the flash / memory-efficient kernels."""
+        return sdpa_kernel([SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION])
+except ImportError:  # torch < 2.3
+    def fast_attention():
+        """Restrict scaled-dot-product attention to the flash / memory-efficient kernels."""
+        return torch.backends.cuda.sdp_kernel(enable_flash=True, enable_mem_efficient=True, enable_math=False)
 
 # Configuration model
 class ServerConfig(BaseModel):
-    compute_engine: str = "gpu"
+    compute_engine: str = "gpu"  # "gpu", "cpu", "gpu-int8", "cpu-int8", "faster-whisper", "faster-whisper-int8" or "onnx-cuda"
     model: str = "base"
     microphone: str = "default"
     server_port: int = 8000
     auth_key: str = ""
     openai_api_key: str = ""
+    vad_filter: bool = True  # drop silence before inference (Silero VAD, or faster-whisper's own)
+
+# Compute engines that run on CUDA when it is available
+FASTER_WHISPER_ENGINES = ("faster-whisper", "faster-whisper-int8")
+GPU_ENGINES = ("gpu", "gpu-int8", "onnx-cuda") + FASTER_WHISPER_ENGINES
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
 config_file = PROJECT_ROOT / "webtalk_config.json"
+ONNX_MODELS_DIR = PROJECT_ROOT / "onnx_models"
+
+# Uploads are read in chunks of this size
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 # Global variables
 model = None
 current_config = ServerConfig()
+_config_cache: Optional[Tuple[int, ServerConfig]] = None  # (mtime_ns, parsed config)
+_config_json: Optional[Tuple[ServerConfig, bytes]] = None  # (config, serialized /config body)
+
+# CUDA staging buffers (pinned host samples, device mel), guarded by GPU_LOCK
+# together with the model they were built for; see install_model
+AUDIO_PINNED: Optional[torch.Tensor] = None
+BATCH_PINNED: Optional[torch.Tensor] = None  # [BATCH_SIZE, 30 s] for transcribe_batch
+CUDA_STREAM: Optional[torch.cuda.Stream] = None  # all inference runs on this stream
+MEL_GPU: Optional[torch.Tensor] = None
+ENCODER_GRAPH: Optional[torch.cuda.CUDAGraph] = None  # replays the encoder on MEL_GPU
+ENCODER_OUT: Optional[torch.Tensor] = None  # static output written by ENCODER_GRAPH
+GPU_LOCK = threading.Lock()
+_HANN_WINDOWS: Dict[torch.device, torch.Tensor] = {}
+
+# LRU of recent transcriptions keyed by the BLAKE3 digest of the uploaded bytes
+TX_CACHE_SIZE = 512
+_TX_CACHE: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+# Silero VAD model, loaded when config.vad_filter is set and silero-vad is installed
+VAD_MODEL = None
+
+# Executor that runs ffmpeg decodes, created on startup
+DECODE_POOL: Optional[ThreadPoolExecutor] = None
+# Admits one inference at a time, so queued requests wait on the event loop
+# instead of each holding a worker thread blocked on the model; created on startup
+INFERENCE_LOCK: Optional[asyncio.Lock] = None
+
+# Short clips for the CUDA openai-whisper model queue here as (samples, future)
+# and are transcribed together, up to BATCH_SIZE per encoder/decoder pass
+BATCH_SIZE = 4
+BATCH_QUEUE: Optional[asyncio.Queue] = None
+_BATCH_TASK: Optional[asyncio.Task] = None
+
+# Reusable 30 s @ 16 kHz float32 decode buffers, one per in-flight request.
+# LIFO so the most recently used (cache-warm) buffer is handed out first;
+# bounded so a burst of concurrent uploads doesn't pin memory forever.
+AUDIO_POOL_SIZE = 32
+AUDIO_POOL: "queue.LifoQueue[np.ndarray]" = queue.LifoQueue(maxsize=AUDIO_POOL_SIZE)
 
 # Initialize the app
-app = FastAPI(title="WebTalk Whisper API", version="1.0.0")
+app = FastAPI(title="WebTalk Whisper API", version="1.0.0", default_response_class=ORJSONResponse)
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class AllowAnyOriginMiddleware:
+    """CORS for any origin as a bare ASGI wrapper.
+
+    Requests without an Origin header (the Chrome extension, the settings
+    app's config push) pass straight through; cross-origin requests get
+    ``Access-Control-Allow-Origin: *`` and preflights are answered here.
+    """
+    
+    PREFLIGHT_HEADERS = [
+        (b"access-control-allow-origin", b"*"),
+        (b"access-control-allow-methods", b"GET, HEAD, POST, OPTIONS"),
+        (b"access-control-max-age", b"600"),
+        (b"content-length", b"0")
+    ]
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope["headers"])
+        if b"origin" not in headers:
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            response_headers = list(self.PREFLIGHT_HEADERS)
+            requested_headers = headers.get(b"access-control-request-headers")
+            if requested_headers:
+                response_headers.append((b"access-control-allow-headers", requested_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"access-control-allow-origin", b"*")]}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+app.add_middleware(AllowAnyOriginMiddleware)
 
 def load_config():
-    """Load configuration from file."""
-    global current_config
+    """Load configuration from file, reusing the parsed config while the file is unchanged."""
+    global current_config, _config_cache
     try:
-        if config_file.exists():
-            with config_file.open('r') as f:
-                config_data = json.load(f)
-                current_config = ServerConfig(**config_data)
-                logger.info(f"Configuration loaded: {current_config.model} model on {current_config.compute_engine}")
-        else:
+        try:
+            mtime = os.stat(config_file).st_mtime_ns
+        except FileNotFoundError:
             # Create default config file
             save_config()
             logger.info("Created default configuration file")
+            return
+        
+        if _config_cache is not None and _config_cache[0] == mtime:
+            current_config = _config_cache[1]
+            return
+        
+        current_config = ServerConfig(**orjson.loads(config_file.read_bytes()))
+        _config_cache = (mtime, current_config)
+        logger.info(f"Configuration loaded: {current_config.model} model on {current_config.compute_engine}")
     except Exception as e:
         logger.error(f"Error loading config: {e}")
         current_config = ServerConfig()
 
 def save_config():
-    """Save current configuration to file."""
+    """Save current configuration to file.
+
+    The file is written to a temporary sibling and swapped in with
+    os.replace, so readers never see a half-written config. The temp name
+    is unique, as the settings app writes the same file.
+    """
+    global _config_cache
     try:
-        with config_file.open('w') as f:
-            json.dump(current_config.model_dump(), f, indent=2)
+        fd, temp_path = tempfile.mkstemp(dir=config_file.parent, prefix=config_file.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(current_config.model_dump(mode="json"), option=orjson.OPT_INDENT_2))
+            os.replace(temp_path, config_file)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        _config_cache = (os.stat(config_file).st_mtime_ns, current_config)
     except Exception as e:
         logger.error(f"Error saving config: {e}")
 
@@ -92,34 +226,799 @@ def launch_settings_app(app_type="flask"):
             
         # Launch settings app in a separate process
         if os.name == 'nt':  # Windows
-            subprocess.Popen([sys.executable, str(app_file)])
+            # Detached, and without inheriting the server's handles (including GPU ones)
+            subprocess.Popen([sys.executable, str(app_file)],
+                             creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NO_WINDOW,
+                             close_fds=True)
         else:  # Unix/Linux/Mac
-            subprocess.Popen([sys.executable, str(app_file)])
+            # posix_spawn doesn't fork() the server's large PyTorch/CUDA address space first
+            pid = os.posix_spawn(sys.executable, [sys.executable, str(app_file)], os.environ)
+            threading.Thread(target=os.waitpid, args=(pid, 0), daemon=True).start()
         logger.info(f"Settings app launcher started ({app_type})")
     except Exception as e:
         logger.error(f"Failed to launch settings app: {e}")
 
+def get_device(config: ServerConfig) -> str:
+    """Resolve the torch device for the configured compute engine."""
+    if config.compute_engine in GPU_ENGINES and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+class CudaBuffers(NamedTuple):
+    """The CUDA staging buffers and encoder graph built for one model."""
+    audio_pinned: torch.Tensor
+    batch_pinned: torch.Tensor
+    mel: torch.Tensor
+    encoder_graph: Optional[torch.cuda.CUDAGraph] = None
+    encoder_out: Optional[torch.Tensor] = None
+
+def allocate_cuda_buffers(n_mels: int) -> CudaBuffers:
+    """Allocate the staging buffers reused by every CUDA transcription."""
+    global CUDA_STREAM
+    torch.backends.cudnn.benchmark = True
+    # A dedicated stream keeps inference off the default stream, so the
+    # pinned uploads and kernels don't serialise behind unrelated work on it
+    if CUDA_STREAM is None:
+        CUDA_STREAM = torch.cuda.Stream()
+    return CudaBuffers(
+        audio_pinned=torch.empty(whisper.audio.N_SAMPLES, dtype=torch.float32, pin_memory=True),
+        batch_pinned=torch.empty(BATCH_SIZE, whisper.audio.N_SAMPLES, dtype=torch.float32, pin_memory=True),
+        mel=torch.zeros(1, n_mels, whisper.audio.N_FRAMES, device="cuda", dtype=torch.float16)
+    )
+
+def capture_encoder_graph(encoder, mel: torch.Tensor) -> Tuple[torch.cuda.CUDAGraph, torch.Tensor]:
+    """Capture the encoder forward on ``mel`` as a CUDA graph, returning (graph, output).
+
+    After pad/trim every mel is [1, n_mels, 3000], so the encoder is a fixed
+    kernel sequence; replaying it skips the Python and launch overhead.
+    """
+    # Warm up on a side stream so lazy cuBLAS/cuDNN init isn't captured
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream), torch.inference_mode(), fast_attention():
+        for _ in range(3):
+            encoder(mel)
+    torch.cuda.current_stream().wait_stream(stream)
+    
+    graph = torch.cuda.CUDAGraph()
+    with torch.inference_mode(), fast_attention(), torch.cuda.graph(graph):
+        out = encoder(mel)
+    return graph, out
+
+def encode_graph(mel: torch.Tensor) -> torch.Tensor:
+    """Run the encoder by replaying the captured graph, or eagerly for
+    shapes the graph wasn't captured for. Must be called with GPU_LOCK held."""
+    if ENCODER_GRAPH is None or mel.shape != MEL_GPU.shape:
+        return model.encoder(mel)
+    if mel.data_ptr() != MEL_GPU.data_ptr():
+        MEL_GPU.copy_(mel)
+    ENCODER_GRAPH.replay()
+    return ENCODER_OUT.clone()
+
+def warmup_model(whisper_model, mel: torch.Tensor):
+    """Decode dummy 30 s windows so CUDA context creation, cuDNN kernel
+    selection and compilation of both the encoder and the decoder happen
+    before the first request.
+
+    Every batch size transcribe_batch can use is warmed up, since each new
+    shape recompiles the encoder and captures new CUDA graphs for it.
+    """
+    options = whisper.DecodingOptions(fp16=True, without_timestamps=True)
+    with torch.cuda.stream(CUDA_STREAM), torch.inference_mode(), fast_attention():
+        for batch_size in range(1, BATCH_SIZE + 1):
+            audio_features = whisper_model.encoder(mel.repeat(batch_size, 1, 1))
+            whisper.decode(whisper_model, audio_features, options)
+    torch.cuda.synchronize()
+
+class OnnxWhisperModel:
+    """Whisper encoder/decoder exported to ONNX, run on ONNX Runtime's CUDA provider.
+
+    Expects the Hugging Face optimum export layout (encoder_model.onnx,
+    decoder_model.onnx and decoder_with_past_model.onnx) under
+    onnx_models/<model>/. The mel input is a preallocated CUDA OrtValue
+    reused between requests; the encoder output, the decoder's key/value
+    cache and the logits all stay on the device through IO binding, and
+    only the chosen token of each decoding step is copied back.
+    """
+    
+    MAX_TOKENS = 224
+    MAX_PROMPT = 4  # sot, language, transcribe, no_timestamps
+    
+    def __init__(self, model_name: str):
+        import onnxruntime as ort
+        
+        model_dir = ONNX_MODELS_DIR / model_name
+        providers = [("CUDAExecutionProvider", {"device_id": 0})]
+        self.encoder = ort.InferenceSession(str(model_dir / "encoder_model.onnx"), providers=providers)
+        self.decoder = ort.InferenceSession(str(model_dir / "decoder_model.onnx"), providers=providers)
+        self.decoder_with_past = ort.InferenceSession(str(model_dir / "decoder_with_past_model.onnx"), providers=providers)
+        self.with_past_inputs = {i.name for i in self.decoder_with_past.get_inputs()}
+        self.present_outputs = {
+            session: [o.name for o in session.get_outputs() if o.name.startswith("present.")]
+            for session in (self.decoder, self.decoder_with_past)
+        }
+        
+        large_v3 = model_name in ("large-v3", "turbo")
+        self.n_mels = 128 if large_v3 else 80
+        self.multilingual = not model_name.endswith(".en")
+        self.dtype = np.float16 if self.encoder.get_inputs()[0].type == "tensor(float16)" else np.float32
+        self.tokenizer = whisper.tokenizer.get_tokenizer(
+            self.multilingual, num_languages=100 if large_v3 else 99, task="transcribe"
+        )
+        self.language_tokens = torch.tensor(list(self.tokenizer.all_language_tokens), device="cuda")
+        
+        # Device-side mel buffer shared by all requests, guarded by self.lock
+        self.mel = ort.OrtValue.ortvalue_from_shape_and_type(
+            [1, self.n_mels, whisper.audio.N_FRAMES], self.dtype, "cuda", 0
+        )
+        # The decoder writes its logits here, so the argmax runs on the GPU
+        vocab_size = self.decoder.get_outputs()[0].shape[-1]
+        self.logits = torch.empty(
+            1, self.MAX_PROMPT, vocab_size, device="cuda",
+            dtype=torch.float16 if self.dtype == np.float16 else torch.float32
+        )
+        self.lock = threading.Lock()
+    
+    def _decode_step(self, tokens: List[int], audio_features, past: Optional[Dict[str, Any]]):
+        """Feed ``tokens`` to the decoder, returning (last-position logits, past).
+
+        Without ``past`` the prompt goes through decoder_model.onnx; after
+        that only the new tokens go through decoder_with_past_model.onnx,
+        with the key/value cache of the previous step bound as CUDA OrtValues.
+        """
+        session = self.decoder if past is None else self.decoder_with_past
+        binding = session.io_binding()
+        binding.bind_cpu_input("input_ids", np.array([tokens], dtype=np.int64))
+        if past is None or "encoder_hidden_states" in self.with_past_inputs:
+            binding.bind_ortvalue_input("encoder_hidden_states", audio_features)
+        for name, value in (past or {}).items():
+            binding.bind_ortvalue_input(name, value)
+        
+        logits = self.logits[:, :len(tokens)]
+        binding.bind_output("logits", "cuda", 0, self.dtype, list(logits.shape), logits.data_ptr())
+        present_names = self.present_outputs[session]
+        for name in present_names:
+            binding.bind_output(name, "cuda")
+        session.run_with_iobinding(binding)
+        
+        # decoder_with_past only returns the self-attention cache; the
+        # cross-attention cache from the first step is kept as is
+        past = dict(past or {})
+        for name, value in zip(present_names, binding.get_outputs()[1:]):
+            past[name.replace("present.", "past_key_values.", 1)] = value
+        return logits[0, -1], past
+    
+    def _transcribe_window(self, mel: np.ndarray):
+        """Greedy-decode a single 30 s mel window, returning (text, language)."""
+        self.mel.update_inplace(np.ascontiguousarray(mel[None], dtype=self.dtype))
+        binding = self.encoder.io_binding()
+        binding.bind_ortvalue_input("input_features", self.mel)
+        binding.bind_output("last_hidden_state", "cuda")
+        self.encoder.run_with_iobinding(binding)
+        audio_features = binding.get_outputs()[0]
+        
+        tokenizer = self.tokenizer
+        pending = [tokenizer.sot]
+        past = None
+        language = "en"
+        if self.multilingual:
+            logits, past = self._decode_step(pending, audio_features, past)
+            index = int(logits[self.language_tokens].argmax())
+            language = tokenizer.all_language_codes[index]
+            pending = [tokenizer.all_language_tokens[index], tokenizer.transcribe]
+        pending.append(tokenizer.no_timestamps)
+        
+        text_tokens = []
+        for _ in range(self.MAX_TOKENS):
+            logits, past = self._decode_step(pending, audio_features, past)
+            next_token = int(logits.argmax())
+            if next_token == tokenizer.eot:
+                break
+            text_tokens.append(next_token)
+            pending = [next_token]
+        
+        return tokenizer.decode(text_tokens), language
+    
+    def transcribe(self, audio: np.ndarray) -> Dict[str, Any]:
+        """Transcribe 16 kHz samples in consecutive 30 s windows."""
+        # Pad the samples rather than the mel, like whisper.transcribe, so the
+        # tail of the last window is the log-mel of silence, not zeros
+        mel = whisper.log_mel_spectrogram(audio, self.n_mels, padding=whisper.audio.N_SAMPLES).numpy()
+        content_frames = len(audio) // whisper.audio.HOP_LENGTH
+        texts = []
+        language = None
+        with self.lock:
+            for start in range(0, max(content_frames, 1), whisper.audio.N_FRAMES):
+                text, window_language = self._transcribe_window(mel[:, start:start + whisper.audio.N_FRAMES])
+                texts.append(text)
+                language = language or window_language
+        return {"text": "".join(texts), "language": language}
+
+def load_faster_whisper_model(config: ServerConfig, device: str):
+    """Load a CTranslate2 (faster-whisper) model for the given configuration."""
+    from faster_whisper import WhisperModel
+    
+    if device == "cuda":
+        compute_type = "int8_float16" if config.compute_engine.endswith("int8") else "float16"
+    else:
+        compute_type = "int8"
+    
+    logger.info(f"Loading faster-whisper model '{config.model}' on {device} ({compute_type})...")
+    return WhisperModel(config.model, device=device, compute_type=compute_type)
+
+def replace_linear_layers(module: torch.nn.Module, make_layer):
+    """Recursively replace every nn.Linear under module with make_layer(linear)."""
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear):
+            setattr(module, name, make_layer(child))
+        else:
+            replace_linear_layers(child, make_layer)
+
+def quantize_cpu_int8(whisper_model):
+    """Dynamically quantize the Linear layers to int8 for CPU inference.
+
+    Whisper uses its own Linear subclass, which quantize_dynamic doesn't
+    match, so the layers are swapped for plain nn.Linear first.
+    """
+    def to_plain_linear(layer):
+        plain = torch.nn.Linear(layer.in_features, layer.out_features, bias=layer.bias is not None)
+        plain.load_state_dict(layer.state_dict())
+        return plain
+    
+    replace_linear_layers(whisper_model, to_plain_linear)
+    return torch.ao.quantization.quantize_dynamic(whisper_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantize_gpu_int8(whisper_model):
+    """Replace the Linear layers with bitsandbytes int8 layers (LLM.int8()).
+
+    The model must still be on the CPU; the int8 weights are quantized when
+    the layers are moved to CUDA.
+    """
+    import bitsandbytes as bnb
+    
+    def to_int8_linear(layer):
+        int8_layer = bnb.nn.Linear8bitLt(
+            layer.in_features, layer.out_features,
+            bias=layer.bias is not None, has_fp16_weights=False, threshold=6.0
+        )
+        int8_layer.weight = bnb.nn.Int8Params(layer.weight.data.half(), requires_grad=False, has_fp16_weights=False)
+        if layer.bias is not None:
+            int8_layer.bias = torch.nn.Parameter(layer.bias.data.half(), requires_grad=False)
+        return int8_layer
+    
+    replace_linear_layers(whisper_model, to_int8_linear)
+    return whisper_model.cuda()
+
+def load_whisper_model(config: ServerConfig) -> Tuple[Any, Optional[CudaBuffers]]:
+    """Load the Whisper model for the given configuration, returning
+    (model, CUDA buffers); the buffers are None off the CUDA openai-whisper engines.
+
+    On CUDA the weights are converted to FP16, the encoder is captured as a
+    CUDA graph for single-window clips, and the encoder/decoder are
+    compiled with torch.compile, then warmed up so the first /transcribe
+    request doesn't pay the compilation cost. Nothing global is touched;
+    install_model swaps the result in.
+    """
+    device = get_device(config)
+    if config.compute_engine in FASTER_WHISPER_ENGINES:
+        return load_faster_whisper_model(config, device), None
+    if config.compute_engine == "onnx-cuda":
+        logger.info(f"Loading ONNX Whisper model '{config.model}' on CUDA...")
+        return OnnxWhisperModel(config.model), None
+    
+    if config.compute_engine == "cpu-int8":
+        logger.info(f"Loading Whisper model '{config.model}' on cpu (int8)...")
+        whisper_model = quantize_cpu_int8(whisper.load_model(config.model, device="cpu"))
+        logger.info("Whisper model loaded successfully!")
+        return whisper_model, None
+    
+    if config.compute_engine == "gpu-int8" and device == "cuda":
+        logger.info(f"Loading Whisper model '{config.model}' on cuda (int8)...")
+        whisper_model = whisper.load_model(config.model, device="cpu").half()
+        for module in whisper_model.modules():
+            if isinstance(module, torch.nn.LayerNorm):
+                module.float()
+        whisper_model = quantize_gpu_int8(whisper_model)
+        # bitsandbytes kernels are neither graph-capturable nor compilable
+        buffers = allocate_cuda_buffers(whisper_model.dims.n_mels)
+        warmup_model(whisper_model, buffers.mel)
+        logger.info("Whisper model loaded successfully!")
+        return whisper_model, buffers
+    
+    logger.info(f"Loading Whisper model '{config.model}' on {device}...")
+    whisper_model = whisper.load_model(config.model, device=device)
+    buffers = None
+    
+    if device == "cuda":
+        whisper_model = whisper_model.half()
+        # Whisper's LayerNorm computes in FP32, so its parameters stay FP32
+        for module in whisper_model.modules():
+            if isinstance(module, torch.nn.LayerNorm):
+                module.float()
+        
+        buffers = allocate_cuda_buffers(whisper_model.dims.n_mels)
+        try:
+            graph, out = capture_encoder_graph(whisper_model.encoder, buffers.mel)
+            buffers = buffers._replace(encoder_graph=graph, encoder_out=out)
+        except Exception as e:
+            logger.warning(f"CUDA graph capture failed, encoder runs eagerly: {e}")
+        
+        encoder, decoder = whisper_model.encoder, whisper_model.decoder
+        try:
+            whisper_model.encoder = torch.compile(encoder, mode="reduce-overhead", fullgraph=True)
+            # No CUDA graphs for the decoder: their outputs are reused between
+            # calls, and decode() reads the KV cache through forward hooks
+            # it installs per call, which would see overwritten tensors
+            whisper_model.decoder = torch.compile(decoder, mode="max-autotune-no-cudagraphs")
+            warmup_model(whisper_model, buffers.mel)
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable, using eager model: {e}")
+            whisper_model.encoder, whisper_model.decoder = encoder, decoder
+            warmup_model(whisper_model, buffers.mel)
+    
+    logger.info("Whisper model loaded successfully!")
+    return whisper_model, buffers
+
+def install_model(whisper_model, buffers: Optional[CudaBuffers]):
+    """Make a load_whisper_model() result the serving model. Must be called
+    with GPU_LOCK held, so no inference sees the model and buffers mid-swap."""
+    global model, AUDIO_PINNED, BATCH_PINNED, MEL_GPU, ENCODER_GRAPH, ENCODER_OUT
+    model = whisper_model
+    if buffers is None:
+        AUDIO_PINNED = BATCH_PINNED = MEL_GPU = ENCODER_GRAPH = ENCODER_OUT = None
+    else:
+        AUDIO_PINNED, BATCH_PINNED, MEL_GPU, ENCODER_GRAPH, ENCODER_OUT = buffers
+
+def reload_model(config: ServerConfig):
+    """Load the model for ``config`` and swap it in.
+
+    Runs in a worker thread while update_config holds INFERENCE_LOCK. The
+    new model, buffers and graph are built under GPU_LOCK before anything
+    is swapped, so if loading fails the old model keeps serving.
+    """
+    with GPU_LOCK:
+        install_model(*load_whisper_model(config))
+
+def acquire_audio_buffer() -> np.ndarray:
+    """Take a decode buffer from the pool, allocating one if it is empty."""
+    try:
+        return AUDIO_POOL.get_nowait()
+    except queue.Empty:
+        return np.empty(whisper.audio.N_SAMPLES, dtype=np.float32)
+
+def release_audio_buffer(buffer: np.ndarray):
+    """Return a decode buffer to the pool, dropping it if the pool is full."""
+    try:
+        AUDIO_POOL.put_nowait(buffer)
+    except queue.Full:
+        pass
+
+def run_ffmpeg(source: str, buffer: np.ndarray, data: Optional[bytes] = None) -> np.ndarray:
+    """Decode ``source`` with ffmpeg to 16 kHz mono float32 samples.
+
+    With ``data``, source is "pipe:0" and the bytes are fed to ffmpeg's stdin
+    from a helper thread. ffmpeg's output is read straight into ``buffer``;
+    audio longer than the buffer spills into a newly allocated array.
+    """
+    cmd = [
+        "ffmpeg", "-loglevel", "error", "-threads", "0",
+        "-i", source,
+        "-f", "f32le", "-ac", "1", "-ar", str(whisper.audio.SAMPLE_RATE),
+        "-"
+    ]
+    if data is None:
+        cmd.insert(1, "-nostdin")
+    stdin = subprocess.PIPE if data is not None else subprocess.DEVNULL
+    with subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        if data is not None:
+            def feed():
+                try:
+                    proc.stdin.write(data)
+                except OSError:
+                    pass  # ffmpeg exited early; its stderr says why
+                finally:
+                    proc.stdin.close()
+            threading.Thread(target=feed, daemon=True).start()
+        
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view):
+            read = proc.stdout.readinto(view[filled:])
+            if not read:
+                break
+            filled += read
+        overflow = proc.stdout.read()
+        error_output = proc.stderr.read()
+    
+    if proc.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {error_output.decode(errors='replace')}")
+    
+    if overflow:
+        return np.concatenate([buffer, np.frombuffer(overflow, dtype=np.float32)])
+    return buffer[:filled // buffer.itemsize]
+
+def load_audio(path: str, buffer: np.ndarray) -> np.ndarray:
+    """Decode an audio file to 16 kHz mono float32 samples with ffmpeg."""
+    return run_ffmpeg(path, buffer)
+
+def load_audio_pipe(data: bytes, buffer: np.ndarray) -> np.ndarray:
+    """Decode in-memory audio to 16 kHz mono float32 samples, piping it through ffmpeg."""
+    return run_ffmpeg("pipe:0", buffer, data)
+
+def load_audio_bytes(data: bytes, buffer: np.ndarray) -> np.ndarray:
+    """Decode an in-memory upload to 16 kHz mono float32 samples with PyAV.
+
+    Samples are written straight into ``buffer``. Longer audio goes into one
+    array sized from the container's duration, grown by doubling when the
+    duration is missing (MediaRecorder WebM doesn't record one) or short.
+    """
+    resampler = av.audio.resampler.AudioResampler(format="flt", layout="mono", rate=whisper.audio.SAMPLE_RATE)
+    out = buffer
+    filled = 0
+    with av.open(io.BytesIO(data)) as container:
+        if container.duration:
+            expected = int(container.duration * whisper.audio.SAMPLE_RATE / av.time_base)
+            if expected > len(out):
+                out = np.empty(expected, dtype=np.float32)
+        
+        # The trailing None flushes the samples still buffered in the resampler
+        for frame in chain(container.decode(audio=0), [None]):
+            for resampled in resampler.resample(frame):
+                samples = resampled.to_ndarray().reshape(-1)
+                end = filled + len(samples)
+                if end > len(out):
+                    grown = np.empty(max(end, 2 * len(out)), dtype=np.float32)
+                    grown[:filled] = out[:filled]
+                    out = grown
+                out[filled:end] = samples
+                filled = end
+    
+    return out[:filled]
+
+PCM16_SCALE = np.float32(1.0 / 32768)
+
+def load_pcm16(data: bytes, buffer: np.ndarray) -> np.ndarray:
+    """Scale 16 kHz mono little-endian int16 PCM to float32 in one pass,
+    writing into ``buffer`` when it fits."""
+    pcm = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+    out = buffer[:len(pcm)] if len(pcm) <= len(buffer) else np.empty(len(pcm), dtype=np.float32)
+    np.multiply(pcm, PCM16_SCALE, out=out)
+    return out
+
+def stage_audio(audio: np.ndarray, pad: bool = False) -> torch.Tensor:
+    """Copy samples to the GPU through the pinned staging buffer.
+
+    Must be called with GPU_LOCK held. With ``pad`` the samples are
+    zero-padded to a full 30 s window, which requires they fit in it.
+    """
+    samples = torch.from_numpy(audio)
+    if samples.numel() > AUDIO_PINNED.numel():
+        return samples.to("cuda")
+    AUDIO_PINNED[:samples.numel()].copy_(samples)
+    if pad:
+        AUDIO_PINNED[samples.numel():].zero_()
+        staged = AUDIO_PINNED
+    else:
+        staged = AUDIO_PINNED[:samples.numel()]
+    return staged.to("cuda", non_blocking=True)
+
+def log_mel_spectrogram(audio: torch.Tensor, n_mels: int) -> torch.Tensor:
+    """whisper.log_mel_spectrogram, computed on the samples' device with a cached window."""
+    window = _HANN_WINDOWS.get(audio.device)
+    if window is None:
+        window = _HANN_WINDOWS[audio.device] = torch.hann_window(whisper.audio.N_FFT, device=audio.device)
+    stft = torch.stft(audio, whisper.audio.N_FFT, whisper.audio.HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel_spec = whisper.audio.mel_filters(audio.device, n_mels) @ magnitudes
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    # Per clip, so a batch of clips gives the same result as one at a time
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+# transcribe()'s silence gate, applied by the single-window paths that bypass it
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+def decoding_result(result) -> Dict[str, Any]:
+    """Convert a whisper DecodingResult to a run_transcription() result,
+    with empty text when transcribe() would have skipped the window as silence."""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return {"text": "", "language": result.language}
+    return {"text": result.text, "language": result.language}
+
+def transcribe_clip(audio: torch.Tensor) -> Dict[str, Any]:
+    """Decode a single padded 30 s window already on the GPU.
+
+    The mel is computed on the device into MEL_GPU, encoded by the captured
+    CUDA graph and passed straight to whisper.decode, skipping transcribe()'s sliding-window bookkeeping.
+    Must be called with GPU_LOCK held.
+    """
+    MEL_GPU[0].copy_(log_mel_spectrogram(audio, model.dims.n_mels))
+    # decode() skips its own encoder pass when given audio features
+    audio_features = encode_graph(MEL_GPU)
+    result = whisper.decode(model, audio_features, whisper.DecodingOptions(fp16=True, without_timestamps=True))[0]
+    return decoding_result(result)
+
+def load_vad_model(config: ServerConfig):
+    """Load Silero VAD for the openai-whisper and ONNX engines if config.vad_filter is set."""
+    global VAD_MODEL
+    if not config.vad_filter:
+        VAD_MODEL = None
+        return
+    if VAD_MODEL is not None:
+        return
+    try:
+        from silero_vad import load_silero_vad
+    except ImportError:
+        logger.info("silero-vad not installed, transcribing without silence trimming")
+        return
+    VAD_MODEL = load_silero_vad()
+    logger.info("Silero VAD loaded")
+
+def trim_silence(audio: np.ndarray) -> np.ndarray:
+    """Keep only the voiced regions Silero VAD finds, so the encoder skips the silence."""
+    from silero_vad import get_speech_timestamps
+    
+    timestamps = get_speech_timestamps(torch.from_numpy(audio), VAD_MODEL, sampling_rate=whisper.audio.SAMPLE_RATE)
+    if not timestamps:
+        return audio[:0]
+    return np.concatenate([audio[t["start"]:t["end"]] for t in timestamps])
+
+# Dictation presets for transcribe() on recordings longer than one window:
+# a single greedy pass per window (no temperature fallback re-decodes) and no
+# conditioning on the previous window's text, which can carry errors forward
+REALTIME_DECODE_OPTIONS = {
+    "temperature": 0.0,
+    "condition_on_previous_text": False,
+    "no_speech_threshold": NO_SPEECH_THRESHOLD,
+    "logprob_threshold": LOGPROB_THRESHOLD,
+    "compression_ratio_threshold": 2.4
+}
+# The same presets for faster-whisper, which spells the logprob option differently
+FASTER_WHISPER_DECODE_OPTIONS = {
+    ("log_prob_threshold" if key == "logprob_threshold" else key): value
+    for key, value in REALTIME_DECODE_OPTIONS.items()
+}
+
+def run_transcription(audio: np.ndarray) -> Dict[str, Any]:
+    """Transcribe with the loaded model, returning openai-whisper's result shape."""
+    if VAD_MODEL is not None and isinstance(model, (whisper.Whisper, OnnxWhisperModel)):
+        audio = trim_silence(audio)
+        if not len(audio):
+            return {"text": "", "language": "unknown"}
+    
+    if isinstance(model, whisper.Whisper) and model.device.type == "cuda":
+        with GPU_LOCK, torch.cuda.stream(CUDA_STREAM), torch.inference_mode(), fast_attention():
+            if len(audio) <= whisper.audio.N_SAMPLES:
+                return transcribe_clip(stage_audio(audio, pad=True))
+            return model.transcribe(stage_audio(audio), fp16=True, **REALTIME_DECODE_OPTIONS)
+    if isinstance(model, whisper.Whisper):
+        with torch.inference_mode():
+            return model.transcribe(audio, fp16=False, **REALTIME_DECODE_OPTIONS)
+    if isinstance(model, OnnxWhisperModel):
+        return model.transcribe(audio)
+    
+    segments, info = transcribe_faster_whisper(audio)
+    return {
+        "text": "".join(segment.text for segment in segments),
+        "language": info.language
+    }
+
+def transcribe_batch(clips: List[np.ndarray]) -> List[Dict[str, Any]]:
+    """Transcribe clips of at most 30 s on the CUDA model in one batched
+    encoder and decoder pass, returning a run_transcription() result per clip.
+
+    /config may have switched engines while the clips were queued, in which
+    case each clip goes through run_transcription on its own.
+    """
+    if len(clips) == 1 or not (isinstance(model, whisper.Whisper) and model.device.type == "cuda"):
+        return [run_transcription(clip) for clip in clips]
+    if VAD_MODEL is not None:
+        clips = [trim_silence(clip) for clip in clips]
+    
+    with GPU_LOCK, torch.cuda.stream(CUDA_STREAM), torch.inference_mode(), fast_attention():
+        # Pad each clip into its row of the pinned batch buffer for an async upload
+        staged = BATCH_PINNED[:len(clips)]
+        for row, clip in zip(staged, clips):
+            samples = torch.from_numpy(clip[:whisper.audio.N_SAMPLES])
+            row[:samples.numel()].copy_(samples)
+            row[samples.numel():].zero_()
+        audio = staged.to("cuda", non_blocking=True)
+        mel = log_mel_spectrogram(audio, model.dims.n_mels).half()
+        options = whisper.DecodingOptions(fp16=True, without_timestamps=True)
+        results = whisper.decode(model, model.encoder(mel), options)
+    return [
+        decoding_result(result) if len(clip) else {"text": "", "language": "unknown"}
+        for result, clip in zip(results, clips)
+    ]
+
+async def batch_worker():
+    """Run queued clips in batches.
+
+    A batch is whatever has queued up by the time the model is free, so a
+    lone request goes straight through while requests that arrive during an
+    inference share the next pass.
+    """
+    while True:
+        batch = [await BATCH_QUEUE.get()]
+        async with INFERENCE_LOCK:
+            while len(batch) < BATCH_SIZE and not BATCH_QUEUE.empty():
+                batch.append(BATCH_QUEUE.get_nowait())
+            try:
+                results = await run_in_threadpool(transcribe_batch, [samples for samples, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+async def infer(samples: np.ndarray) -> Dict[str, Any]:
+    """Transcribe decoded samples on the worker threadpool, one inference at
+    a time; short clips for the CUDA openai-whisper model are batched."""
+    if (isinstance(model, whisper.Whisper) and model.device.type == "cuda"
+            and len(samples) <= whisper.audio.N_SAMPLES):
+        future = asyncio.get_running_loop().create_future()
+        await BATCH_QUEUE.put((samples, future))
+        return await future
+    async with INFERENCE_LOCK:
+        return await run_in_threadpool(run_transcription, samples)
+
+def transcribe_faster_whisper(audio: np.ndarray):
+    """Start a faster-whisper transcription, returning its lazy (segments, info)."""
+    # Greedy decoding without timestamp tokens, like the openai-whisper clip path
+    return model.transcribe(
+        audio, beam_size=1, vad_filter=current_config.vad_filter, without_timestamps=True, **FASTER_WHISPER_DECODE_OPTIONS
+    )
+
+def transcribe_segments(audio: np.ndarray) -> Tuple[Iterator[Dict[str, Any]], Optional[str]]:
+    """Like run_transcription, but returns (segments, language) where segments
+    yields {"text", "start", "end"} dicts.
+
+    faster-whisper decodes lazily, so its segments are produced as decoding
+    progresses; the other engines return them all at once.
+    """
+    if not isinstance(model, (whisper.Whisper, OnnxWhisperModel)):
+        segments, info = transcribe_faster_whisper(audio)
+        return ({"text": s.text, "start": s.start, "end": s.end} for s in segments), info.language
+    
+    result = run_transcription(audio)
+    # The single-window paths only return the text
+    segments = result.get("segments") or [
+        {"text": result["text"], "start": 0.0, "end": len(audio) / whisper.audio.SAMPLE_RATE}
+    ]
+    return ({"text": s["text"], "start": s["start"], "end": s["end"]} for s in segments), result.get("language")
+
+async def transcribe_upload(decode, source) -> Dict[str, Any]:
+    """Decode an upload into a pooled buffer with ``decode(source, buffer)``
+    (load_audio for a file path, load_audio_bytes or load_audio_pipe for
+    in-memory bytes) and transcribe it.
+
+    Decoding runs on DECODE_POOL so several uploads can be decoded while the
+    model is busy; inference runs on the regular worker threadpool.
+    """
+    buffer = acquire_audio_buffer()
+    try:
+        loop = asyncio.get_running_loop()
+        samples = await loop.run_in_executor(DECODE_POOL, decode, source, buffer)
+        return await infer(samples)
+    except asyncio.CancelledError:
+        # The client went away, but a worker thread may still be reading the
+        # samples, so the buffer must not be handed to another request
+        buffer = None
+        raise
+    finally:
+        if buffer is not None:
+            release_audio_buffer(buffer)
+
+def cache_transcription(cache_key: bytes, result: Dict[str, Any]):
+    """Remember a transcription in the LRU, evicting the oldest entry when full."""
+    _TX_CACHE[cache_key] = result
+    if len(_TX_CACHE) > TX_CACHE_SIZE:
+        _TX_CACHE.popitem(last=False)
+
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"  # start of every WebM/Matroska file
+WEBM_TYPES = ("audio/webm", "video/webm")
+WAV_TYPES = ("audio/wav", "audio/wave", "audio/x-wav")
+
+def matches_content_type(header: bytes, content_type: Optional[str]) -> bool:
+    """Check an upload's first bytes against its declared WebM or WAV type.
+
+    Other types aren't checked and are left to the decoder.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in WEBM_TYPES:
+        return header[:4] == EBML_MAGIC
+    if media_type in WAV_TYPES:
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    return True
+
+async def upload_chunks(audio: UploadFile):
+    """Yield the upload in UPLOAD_CHUNK_SIZE chunks, rejecting it with a 400
+    up front if its header contradicts its content type."""
+    chunk = await audio.read(UPLOAD_CHUNK_SIZE)
+    if chunk and not matches_content_type(chunk, audio.content_type):
+        raise HTTPException(status_code=400, detail=f"Upload is not valid {audio.content_type}")
+    while chunk:
+        yield chunk
+        chunk = await audio.read(UPLOAD_CHUNK_SIZE)
+
+class SpooledUpload(NamedTuple):
+    """An upload ready to decode with ``decode(source, buffer)``."""
+    decode: Any
+    source: Any
+    size: int
+    digest: bytes  # BLAKE3 of the uploaded bytes, the transcription cache key
+
+@asynccontextmanager
+async def spool_upload(audio: UploadFile):
+    """Read an upload for decoding, hashing it on the way.
+
+    Uploads stay in memory: PyAV decodes them in-process, and otherwise
+    ffmpeg reads them from a memfd (Linux) or its stdin, so nothing is
+    written to disk. The memfd is closed on exit.
+    """
+    memfd = None
+    try:
+        hasher = blake3.blake3()
+        if av is not None or not hasattr(os, "memfd_create"):
+            audio_data = bytearray()
+            async for chunk in upload_chunks(audio):
+                hasher.update(chunk)
+                audio_data += chunk
+            decode = load_audio_bytes if av is not None else load_audio_pipe
+            yield SpooledUpload(decode, audio_data, len(audio_data), hasher.digest())
+            return
+        
+        # Linux: spool into an anonymous in-memory file. ffmpeg runs in its
+        # own process, so it opens the fd through our pid's /proc entry.
+        memfd = os.memfd_create("upload.webm")
+        audio_size = 0
+        async for chunk in upload_chunks(audio):
+            hasher.update(chunk)
+            os.write(memfd, chunk)
+            audio_size += len(chunk)
+        yield SpooledUpload(load_audio, f"/proc/{os.getpid()}/fd/{memfd}", audio_size, hasher.digest())
+    finally:
+        if memfd is not None:
+            os.close(memfd)
+
+def pin_worker_gpu():
+    """Restrict this worker process to one GPU from --gpus, round-robin by WORKER_ID.
+
+    Must run before CUDA is initialised, which is why it happens at the
+    very start of startup_event.
+    """
+    gpus = [gpu.strip() for gpu in os.environ.get("WEBTALK_GPUS", "").split(",") if gpu.strip()]
+    worker_id = os.environ.get("WORKER_ID")
+    if gpus and worker_id is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = gpus[int(worker_id) % len(gpus)]
+        logger.info(f"Worker {worker_id} pinned to GPU {os.environ['CUDA_VISIBLE_DEVICES']}")
+
 @app.on_event("startup")
 async def startup_event():
     """Load configuration and Whisper model on startup."""
-    global model
+    global DECODE_POOL, INFERENCE_LOCK, BATCH_QUEUE, _BATCH_TASK
+    
+    pin_worker_gpu()
+    
+    # ffmpeg and PyAV decode outside the GIL, so threads give real parallelism
+    DECODE_POOL = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2), thread_name_prefix="decode")
+    INFERENCE_LOCK = asyncio.Lock()
+    BATCH_QUEUE = asyncio.Queue()
+    _BATCH_TASK = asyncio.create_task(batch_worker())
     
     # Load configuration first
     load_config()
     
     try:
-        # Determine device based on config
-        if current_config.compute_engine == "gpu" and torch.cuda.is_available():
-            device = "cuda"
-        else:
-            device = "cpu"
-            
-        logger.info(f"Loading Whisper model '{current_config.model}' on {device}...")
-        model = whisper.load_model(current_config.model, device=device)
-        logger.info("Whisper model loaded successfully!")
+        reload_model(current_config)
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise
+    load_vad_model(current_config)
 
 @app.get("/")
 async def root():
@@ -144,12 +1043,15 @@ async def health_check():
 @app.get("/config")
 async def get_config():
     """Get current server configuration."""
-    return current_config.model_dump()
+    global _config_json
+    if _config_json is None or _config_json[0] is not current_config:
+        _config_json = (current_config, orjson.dumps(current_config.model_dump(mode="json")))
+    return Response(content=_config_json[1], media_type="application/json")
 
 @app.post("/config")
 async def update_config(config: ServerConfig):
     """Update server configuration."""
-    global current_config, model
+    global current_config
     
     try:
         old_config = current_config.model_dump()
@@ -166,10 +1068,14 @@ async def update_config(config: ServerConfig):
         )
         
         if needs_reload:
-            device = "cuda" if config.compute_engine == "gpu" and torch.cuda.is_available() else "cpu"
-            logger.info(f"Reloading model '{config.model}' on {device}...")
-            model = whisper.load_model(config.model, device=device)
-            logger.info("Model reloaded successfully!")
+            # Off the event loop, so other connections keep being served
+            # while the model loads and compiles
+            async with INFERENCE_LOCK:
+                await run_in_threadpool(reload_model, config)
+            _TX_CACHE.clear()
+        if config.vad_filter != old_config.get("vad_filter"):
+            load_vad_model(config)
+            _TX_CACHE.clear()
         
         return {"status": "success", "message": "Configuration updated"}
     except Exception as e:
@@ -182,50 +1088,175 @@ async def transcribe_audio(audio: UploadFile = File(...)):
     if not model:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
-    logger.info(f"Processing audio file: {audio.filename}")
+    logger.debug("Processing audio file: %s", audio.filename)
     
     try:
-        # Read the uploaded file
-        audio_content = await audio.read()
-        
-        if len(audio_content) == 0:
-            raise HTTPException(status_code=400, detail="Empty audio file")
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
-            temp_file.write(audio_content)
-            temp_file_path = temp_file.name
-        
-        # Transcribe
-        result = model.transcribe(temp_file_path)
-        
-        # Clean up
-        os.unlink(temp_file_path)
+        async with spool_upload(audio) as upload:
+            if upload.size == 0:
+                raise HTTPException(status_code=400, detail="Empty audio file")
+            
+            # Retried uploads of the same recording are answered from the cache
+            result = _TX_CACHE.get(upload.digest)
+            if result is not None:
+                _TX_CACHE.move_to_end(upload.digest)
+            else:
+                # Decode and transcribe in worker threads so other requests keep flowing
+                transcription = await transcribe_upload(upload.decode, upload.source)
+                result = {"text": transcription["text"], "language": transcription.get("language", "unknown")}
+                cache_transcription(upload.digest, result)
         
-        logger.info(f"Transcription successful: {result['text'][:50]}...")
+        logger.debug("Transcription successful: %.50s...", result["text"])
         
-        return JSONResponse(content={
+        return {
             "success": True,
             "transcription": result["text"],
             "language": result.get("language", "unknown"),
             "filename": audio.filename
-        })
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        # Clean up on error
-        if 'temp_file_path' in locals():
+        logger.error(f"Transcription error: {e}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+def ndjson_line(obj) -> bytes:
+    """Serialise obj as one line of newline-delimited JSON."""
+    return orjson.dumps(obj) + b"\n"
+
+def stream_transcription(samples: np.ndarray, buffer: np.ndarray, cache_key: bytes) -> Iterator[bytes]:
+    """Yield an NDJSON line per segment as it is decoded, then a final summary line.
+
+    hold_inference_lock() iterates this in the threadpool; the decode buffer
+    goes back to the pool once the stream ends.
+    """
+    try:
+        segments, language = transcribe_segments(samples)
+        texts = []
+        for segment in segments:
+            texts.append(segment["text"])
+            yield ndjson_line(segment)
+        result = {"text": "".join(texts), "language": language or "unknown"}
+        cache_transcription(cache_key, result)
+        logger.debug("Transcription successful: %.50s...", result["text"])
+        yield ndjson_line({"done": True, "transcription": result["text"], "language": result["language"]})
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        yield ndjson_line({"done": True, "error": f"Transcription failed: {str(e)}"})
+    finally:
+        release_audio_buffer(buffer)
+
+async def hold_inference_lock(lines: Iterator[bytes]):
+    """Iterate a stream_transcription() generator in the threadpool while holding INFERENCE_LOCK."""
+    async with INFERENCE_LOCK:
+        async for line in iterate_in_threadpool(lines):
+            yield line
+
+@app.post("/transcribe/stream")
+async def transcribe_audio_stream(audio: UploadFile = File(...)):
+    """Transcribe uploaded audio, streaming the segments as NDJSON.
+
+    Each line is {"text", "start", "end"} for a segment, and the last line is
+    {"done": true, "transcription", "language"} (or {"done": true, "error"}).
+    """
+    if not model:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    logger.debug("Processing audio file (streaming): %s", audio.filename)
+    
+    try:
+        async with spool_upload(audio) as upload:
+            if upload.size == 0:
+                raise HTTPException(status_code=400, detail="Empty audio file")
+            
+            result = _TX_CACHE.get(upload.digest)
+            if result is not None:
+                _TX_CACHE.move_to_end(upload.digest)
+                summary = {"done": True, "transcription": result["text"], "language": result["language"]}
+                return Response(content=ndjson_line(summary), media_type="application/x-ndjson")
+            
+            # Decode up front, while the upload is still spooled; only inference is streamed
+            buffer = acquire_audio_buffer()
             try:
-                os.unlink(temp_file_path)
-            except:
-                pass
-        
+                loop = asyncio.get_running_loop()
+                samples = await loop.run_in_executor(DECODE_POOL, upload.decode, upload.source, buffer)
+            except BaseException:
+                release_audio_buffer(buffer)
+                raise
+    except HTTPException:
+        raise
+    except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+    
+    lines = stream_transcription(samples, buffer, upload.digest)
+    return StreamingResponse(hold_inference_lock(lines), media_type="application/x-ndjson")
+
+# Most a /transcribe_ws client may send: 5 minutes of 16 kHz int16 PCM
+# (WebM recordings are far smaller for the same length)
+MAX_STREAM_BYTES = 5 * 60 * whisper.audio.SAMPLE_RATE * 2
+
+@app.websocket("/transcribe_ws")
+async def transcribe_websocket(websocket: WebSocket):
+    """Transcribe audio streamed over a WebSocket while it is being recorded.
+
+    The client sends binary messages while recording, then the text message
+    "stop"; the reply is the /transcribe JSON body, after which the socket is
+    closed. The messages are 16 kHz mono little-endian int16 samples, or with
+    ?format=webm the consecutive chunks of a MediaRecorder WebM recording.
+    A stream longer than MAX_STREAM_BYTES gets an error reply and is closed
+    with 1009 (message too big).
+    """
+    await websocket.accept()
+    if not model:
+        await websocket.send_text(orjson.dumps({"success": False, "error": "Model not loaded"}).decode())
+        await websocket.close()
+        return
+    
+    encoded = websocket.query_params.get("format") == "webm"
+    pcm = bytearray()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                pcm += message["bytes"]
+                if len(pcm) > MAX_STREAM_BYTES:
+                    reply = {"success": False, "error": "Recording is too long"}
+                    await websocket.send_text(orjson.dumps(reply).decode())
+                    await websocket.close(code=1009)
+                    return
+            elif message.get("text") == "stop":
+                break
+        
+        if not pcm:
+            reply = {"success": False, "error": "Empty audio"}
+        elif encoded and pcm[:4] != EBML_MAGIC:
+            reply = {"success": False, "error": "Recording is not valid WebM"}
+        else:
+            if encoded:
+                logger.debug("Processing streamed recording: %d bytes", len(pcm))
+                transcription = await transcribe_upload(load_audio_bytes if av is not None else load_audio_pipe, pcm)
+            else:
+                logger.debug("Processing streamed audio: %.1fs", len(pcm) / 2 / whisper.audio.SAMPLE_RATE)
+                transcription = await transcribe_upload(load_pcm16, pcm)
+            logger.debug("Transcription successful: %.50s...", transcription["text"])
+            reply = {
+                "success": True,
+                "transcription": transcription["text"],
+                "language": transcription.get("language", "unknown")
+            }
+        await websocket.send_text(orjson.dumps(reply).decode())
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        await websocket.send_text(orjson.dumps({"success": False, "error": f"Transcription failed: {str(e)}"}).decode())
+    await websocket.close()
 
-@app.get("/recorder", response_class=HTMLResponse)
-async def get_recorder_interface():
-    """Serve the web-based recording interface that replicates the Chrome extension functionality."""
-    html_content = """
+# Web-based recording interface that replicates the Chrome extension functionality
+_RECORDER_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -488,6 +1519,7 @@ async def get_recorder_interface():
                 this.mediaRecorder = null;
                 this.audioChunks = [];
                 this.stream = null;
+                this.socket = null;
                 this.shouldAutoCopy = false;
                 
                 this.initializeElements();
@@ -516,6 +1548,12 @@ async def get_recorder_interface():
                 this.stopButton.addEventListener('click', () => this.stopRecording());
                 this.stopCopyButton.addEventListener('click', () => this.stopAndCopyRecording());
                 this.copyButton.addEventListener('click', () => this.copyTranscription());
+                // Release the microphone only when the page goes away
+                window.addEventListener('beforeunload', () => {
+                    if (this.stream) {
+                        this.stream.getTracks().forEach(track => track.stop());
+                    }
+                });
             }
 
             async checkServerStatus() {
@@ -552,24 +1590,34 @@ async def get_recorder_interface():
                         return;
                     }
 
-                    // Request microphone access
-                    this.stream = await navigator.mediaDevices.getUserMedia({ 
-                        audio: {
-                            echoCancellation: true,
-                            noiseSuppression: true,
-                            autoGainControl: true
-                        } 
-                    });
+                    // Request microphone access once; the stream is reused by every
+                    // recording so later starts skip the permission and device setup
+                    if (!this.stream) {
+                        this.stream = await navigator.mediaDevices.getUserMedia({ 
+                            audio: {
+                                echoCancellation: true,
+                                noiseSuppression: true,
+                                autoGainControl: true
+                            } 
+                        });
+                    }
 
                     // Setup MediaRecorder
                     this.mediaRecorder = new MediaRecorder(this.stream, {
                         mimeType: 'audio/webm;codecs=opus'
                     });
 
+                    // Upload while recording: each chunk goes out over the socket
+                    // as soon as it is recorded. The chunks are also kept so the
+                    // recording can still be posted if the socket is unavailable.
+                    this.socket = await this.openSocket();
                     this.audioChunks = [];
                     this.mediaRecorder.ondataavailable = (event) => {
                         if (event.data.size > 0) {
                             this.audioChunks.push(event.data);
+                            if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+                                this.socket.send(event.data);
+                            }
                         }
                     };
 
@@ -577,8 +1625,8 @@ async def get_recorder_interface():
                         this.processRecording();
                     };
 
-                    // Start recording
-                    this.mediaRecorder.start();
+                    // Start recording, delivering a chunk every 250 ms
+                    this.mediaRecorder.start(250);
                     this.isRecording = true;
                     this.updateUI('recording');
                     
@@ -592,12 +1640,6 @@ async def get_recorder_interface():
                 if (this.mediaRecorder && this.isRecording) {
                     this.mediaRecorder.stop();
                     this.isRecording = false;
-                    
-                    // Stop all tracks
-                    if (this.stream) {
-                        this.stream.getTracks().forEach(track => track.stop());
-                    }
-                    
                     this.updateUI('processing');
                 }
             }
@@ -607,34 +1649,92 @@ async def get_recorder_interface():
                 this.stopRecording();
             }
 
-            async processRecording() {
+            async openSocket() {
                 try {
-                    // Create audio blob
-                    const audioBlob = new Blob(this.audioChunks, { type: 'audio/webm' });
-                    
-                    if (audioBlob.size === 0) {
-                        this.showError('No audio data recorded. Please try again.');
-                        this.updateUI('idle');
-                        return;
-                    }
+                    const socket = new WebSocket(`${location.origin.replace(/^http/, 'ws')}/transcribe_ws?format=webm`);
+                    await new Promise((resolve, reject) => {
+                        socket.onopen = resolve;
+                        socket.onerror = reject;
+                    });
+                    return socket;
+                } catch (error) {
+                    console.warn('Streaming upload unavailable, posting the recording instead');
+                    return null;
+                }
+            }
 
-                    // Create form data
-                    const formData = new FormData();
-                    formData.append('audio', audioBlob, 'recording.webm');
+            finishSocketUpload(socket) {
+                // The chunks were sent as they were recorded; only the reply is left
+                return new Promise((resolve, reject) => {
+                    socket.onmessage = event => resolve(JSON.parse(event.data));
+                    socket.onclose = () => reject(new Error('Connection to the server was lost'));
+                    socket.send('stop');
+                }).finally(() => socket.close());
+            }
 
-                    // Send to server
-                    const response = await fetch('/transcribe', {
-                        method: 'POST',
-                        body: formData
-                    });
+            async uploadRecording() {
+                // Create audio blob
+                const audioBlob = new Blob(this.audioChunks, { type: 'audio/webm' });
+                
+                if (audioBlob.size === 0) {
+                    throw new Error('No audio data recorded. Please try again.');
+                }
+
+                // Create form data
+                const formData = new FormData();
+                formData.append('audio', audioBlob, 'recording.webm');
+
+                // Send to server, showing each segment as soon as it is decoded
+                const response = await fetch('/transcribe/stream', {
+                    method: 'POST',
+                    body: formData
+                });
 
-                    if (!response.ok) {
-                        throw new Error(`Server error: ${response.status}`);
+                if (!response.ok) {
+                    throw new Error(`Server error: ${response.status}`);
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let pending = '';
+                let partial = '';
+                let result = null;
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) {
+                        break;
                     }
+                    pending += decoder.decode(value, { stream: true });
+                    const lines = pending.split('\\n');
+                    pending = lines.pop();
+                    for (const line of lines) {
+                        if (!line) {
+                            continue;
+                        }
+                        const message = JSON.parse(line);
+                        if (message.done) {
+                            result = message;
+                        } else {
+                            partial += message.text;
+                            this.displayTranscription(partial);
+                        }
+                    }
+                }
+                return result;
+            }
 
-                    const result = await response.json();
+            async processRecording() {
+                const socket = this.socket;
+                this.socket = null;
+                try {
+                    let result;
+                    if (socket && socket.readyState === WebSocket.OPEN) {
+                        result = await this.finishSocketUpload(socket);
+                    } else {
+                        result = await this.uploadRecording();
+                    }
                     
-                    if (result.success && result.transcription) {
+                    if (result && !result.error && result.transcription) {
                         this.displayTranscription(result.transcription);
                         
                         if (this.shouldAutoCopy) {
@@ -729,8 +1829,65 @@ async def get_recorder_interface():
     </script>
 </body>
 </html>
-    """
-    return HTMLResponse(content=html_content)
+"""
+
+# The recorder page never changes at runtime, so compress it once at import
+_RECORDER_HTML_GZ = gzip.compress(_RECORDER_HTML.encode("utf-8"), compresslevel=9, mtime=0)
+_RECORDER_ETAG = f'W/"{hashlib.sha1(_RECORDER_HTML_GZ).hexdigest()[:16]}"'
+
+@app.api_route("/recorder", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def get_recorder_interface(request: Request):
+    """Serve the web-based recording interface that replicates the Chrome extension functionality."""
+    headers = {
+        "Cache-Control": "public, max-age=3600",
+        "ETag": _RECORDER_ETAG,
+        "Vary": "Accept-Encoding"
+    }
+    if request.headers.get("if-none-match") == _RECORDER_ETAG:
+        return Response(status_code=304, headers=headers)
+    
+    if "gzip" not in request.headers.get("accept-encoding", ""):
+        return HTMLResponse(content=_RECORDER_HTML, headers=headers)
+    
+    headers["Content-Encoding"] = "gzip"
+    return Response(content=_RECORDER_HTML_GZ, media_type="text/html; charset=utf-8", headers=headers)
+
+# uvicorn picks uvloop and httptools by itself ("auto") when they are
+# installed (uvicorn[standard]), and falls back to asyncio/h11, e.g. uvloop on Windows.
+# Inference is serialised, so a small connection limit keeps a burst of long
+# uploads from piling up decoded audio; excess connections get a 503.
+UVICORN_OPTIONS = {
+    "loop": "auto",
+    "http": "auto",
+    "limit_concurrency": 16,
+    "timeout_keep_alive": 30,
+    "access_log": False,
+    "log_level": "warning"
+}
+
+def run_worker(worker_id: int, sock, port: int):
+    """Entry point of a --workers child process serving on the shared socket."""
+    os.environ["WORKER_ID"] = str(worker_id)
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, **UVICORN_OPTIONS)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def run_workers(workers: int, port: int):
+    """Serve with several independent worker processes sharing one listening socket."""
+    import multiprocessing
+    
+    sock = uvicorn.Config(app, host="127.0.0.1", port=port).bind_socket()
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(worker_id, sock, port)) for worker_id in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    finally:
+        sock.close()
 
 if __name__ == "__main__":
     import argparse
@@ -739,6 +1896,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="WebTalk Whisper Server")
     parser.add_argument("--settings-app", choices=["flask", "tkinter", "none"], default="none",
                        help="Launch settings app (flask, tkinter, or none)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+                       help="Number of server processes, each with its own model (default: $WEB_CONCURRENCY or 1)")
+    parser.add_argument("--gpus", default="",
+                       help="Comma-separated GPU ids to spread workers across, e.g. 0,1")
     args = parser.parse_args()
     
     # Load config to get the port
@@ -749,4 +1910,9 @@ if __name__ == "__main__":
         launch_settings_app(args.settings_app)
     
     logger.info(f"Starting WebTalk Whisper Server on port {current_config.server_port}...")
-    uvicorn.run(app, host="127.0.0.1", port=current_config.server_port, log_level="info") 
+    if args.workers > 1:
+        os.environ["WEBTALK_GPUS"] = args.gpus
+        logger.info(f"Running {args.workers} workers")
+        run_workers(args.workers, current_config.server_port)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=current_config.server_port, **UVICORN_OPTIONS)
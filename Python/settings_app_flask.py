@@ -4,177 +4,717 @@ WebTalk Settings Desktop App - Flask + PyWebView Version
 Beautiful desktop settings interface using the original HTML design.
 """
 
+import atexit
+import gzip
+import hashlib
 import json
+import os
+import socket
+import tempfile
 import threading
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
-import requests
 import webview
-from flask import Flask, render_template_string, request, jsonify
-import ctypes
-from ctypes import wintypes
+from flask import Flask, Response, redirect, request, send_file
+
+try:
+    import orjson
+    
+    def dumps_json(obj) -> bytes:
+        """Serialise obj to compact UTF-8 JSON."""
+        return orjson.dumps(obj)
+    
+    loads_json = orjson.loads
+except ImportError:  # orjson is only a hard dependency of the server
+    def dumps_json(obj) -> bytes:
+        """Serialise obj to compact UTF-8 JSON."""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    
+    loads_json = json.loads
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
 IMAGES_DIR = PROJECT_ROOT / "Images"
 CONFIG_FILE = PROJECT_ROOT / "webtalk_config.json"
+MIC_CACHE_FILE = Path.home() / ".webtalk-mics.json"
+VENDOR_DIR = BASE_DIR / "static" / "vendor"
+MIC_CACHE_TTL = 30  # seconds before /api/microphones re-enumerates devices
+SAVE_DEBOUNCE = 0.25  # seconds; saves closer together than this share one write
+HOST = '127.0.0.1'
+PORT = 5555
+STARTUP_TIMEOUT = 10  # seconds to wait for the server before opening the window anyway
+
+# Pages are revalidated against their ETag on every load, so unchanged
+# pages come back as a 304
+NO_CACHE_HEADERS = {'Cache-Control': 'no-cache'}
+
+# Third-party stylesheets, downloaded on first use and then served locally
+VENDOR_ASSETS = {
+    "tailwind.min.css": "https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css",
+    "material-icons.css": "https://fonts.googleapis.com/css2?family=Material+Icons",
+    "roboto.css": "https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;700&display=swap"
+}
+FONT_FILES_URL = "https://fonts.gstatic.com/"  # font files referenced by the Google Fonts CSS
+VENDOR_MAX_AGE = 365 * 24 * 3600  # vendored assets are versioned, so cache them for a year
+
+# Whisper models offered in the model selector: (value, label)
+MODELS = [
+    ("tiny", "Tiny"),
+    ("base", "Base"),
+    ("small", "Small"),
+    ("medium", "Medium"),
+    ("large", "Large"),
+    ("large-v2", "Large-v2"),
+    ("large-v3", "Large-v3"),
+    ("turbo", "Turbo")
+]
+
+# Shown until the real input devices have been enumerated
+DEFAULT_MICROPHONES = [
+    {"value": "default", "label": "Default Microphone"},
+    {"value": "mic1", "label": "Microphone 1 (USB)"},
+    {"value": "mic2", "label": "Microphone 2 (Built-in)"}
+]
+
+def vendor_url(name):
+    """Upstream URL of a vendored asset, or None if name isn't one"""
+    if name in VENDOR_ASSETS:
+        return VENDOR_ASSETS[name]
+    if name.startswith("fonts/") and ".." not in Path(name).parts:
+        return FONT_FILES_URL + name[len("fonts/"):]
+    return None
+
+def wait_for_port(host, port, timeout):
+    """Poll until something accepts TCP connections on host:port; False on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def write_file_atomic(path, data):
+    """Write data to a temp file and rename it over path, so a crash
+    mid-write can never leave a truncated file behind.
+
+    The temp file is unique to this write: the server saves the same
+    config file, and a shared name would let the two writers interleave
+    or rename it out from under each other.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+def json_response(obj, status=200):
+    """Serialise obj straight to a JSON response body"""
+    return Response(dumps_json(obj), status=status, mimetype='application/json')
+
+def compress_page(html):
+    """Encode a static page once: (UTF-8 bytes, gzip bytes, ETag)"""
+    raw = html.encode("utf-8")
+    return raw, gzip.compress(raw, compresslevel=9, mtime=0), hashlib.sha1(raw).hexdigest()
+
+SERVER_URL = "http://localhost:8000"
+
+# Default configuration
+DEFAULT_CONFIG = {
+    "compute_engine": "gpu",
+    "model": "base",
+    "microphone": "default",
+    "server_port": 8000,
+    "auth_key": "",
+    "openai_api_key": ""
+}
+
+try:
+    import msgspec
+    
+    class SettingsMsg(msgspec.Struct):
+        """Body of POST /api/config"""
+        compute_engine: str = "gpu"
+        model: str = "base"
+        microphone: str = "default"
+        server_port: int = 8000
+        auth_key: str = ""
+        openai_api_key: str = ""
+    
+    def decode_settings(data):
+        """Parse and validate a settings body into config values"""
+        # strict=False still accepts a port sent as a string
+        msg = msgspec.json.decode(data, type=SettingsMsg, strict=False)
+        return msgspec.structs.asdict(msg)
+except ImportError:
+    def decode_settings(data):
+        """Parse and validate a settings body into config values"""
+        data = loads_json(data)
+        return {
+            "compute_engine": data.get("compute_engine", "gpu"),
+            "model": data.get("model", "base"),
+            "microphone": data.get("microphone", "default"),
+            "server_port": int(data.get("server_port", 8000)),
+            "auth_key": data.get("auth_key", ""),
+            "openai_api_key": data.get("openai_api_key", "")
+        }
+
+def load_config():
+    """Load configuration from file over the defaults"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        saved_config = loads_json(CONFIG_FILE.read_bytes())
+        config.update(saved_config)
+    except FileNotFoundError:
+        pass  # first run: keep the defaults
+    except Exception as e:
+        print(f"Error loading config: {e}")
+    return config
+
+CFG = load_config()
+
+def encode_config():
+    """Serialise CFG once for GET /api/config: (JSON bytes, ETag)"""
+    body = dumps_json(CFG)
+    return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+
+_config_body = encode_config()  # re-encoded whenever the settings are saved
+
+_requests = None  # imported on first save; only needed to reach the server
+_session = None  # keep-alive session reused across config posts
+_last_payload = None  # last JSON written, to skip no-op saves
+_save_timer = None  # pending debounced write_config
+_save_lock = threading.Lock()
+_write_lock = threading.Lock()  # a timer that already fired can't be cancelled
+
+def save_config():
+    """Schedule a config write, coalescing saves in quick succession"""
+    global _save_timer
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        _save_timer = threading.Timer(SAVE_DEBOUNCE, write_config)
+        _save_timer.start()
+
+def flush_config():
+    """Write a save still waiting on its debounce timer right away"""
+    global _save_timer
+    with _save_lock:
+        timer, _save_timer = _save_timer, None
+    if timer is not None:
+        timer.cancel()
+        write_config()
+
+# The timer is a daemon thread (it starts on waitress or js_api threads), so
+# a save made just before the window closes would otherwise be lost
+atexit.register(flush_config)
+
+def write_config():
+    """Save configuration to file"""
+    global _last_payload
+    with _write_lock:
+        payload = dumps_json(CFG)
+        if payload == _last_payload:
+            return
+        try:
+            write_file_atomic(CONFIG_FILE, payload)
+            _last_payload = payload
+        except Exception as e:
+            print(f"Error saving config: {e}")
 
-class WebTalkSettingsApp:
-    def __init__(self):
-        self.config_file = CONFIG_FILE
-        self.server_url = "http://localhost:8000"
+def load_cached_microphones():
+    """Load the microphone list saved by the last enumeration"""
+    try:
+        with MIC_CACHE_FILE.open('rb') as f:
+            return loads_json(f.read())
+    except (OSError, ValueError):
+        return DEFAULT_MICROPHONES
+
+def cache_microphones(microphones):
+    """Store the microphone list with its response body serialised up front"""
+    body = dumps_json(microphones)
+    body_gz = gzip.compress(body)
+    # A short list doesn't shrink; only keep the gzip body when it helps
+    _mic_cache.update(data=microphones, body=body, body_gz=body_gz if len(body_gz) < len(body) else None)
+
+def query_microphones(refresh=False):
+    """List the input devices, or None if they can't be enumerated"""
+    try:
+        import sounddevice
+        if refresh and hasattr(sounddevice, '_terminate') and hasattr(sounddevice, '_initialize'):
+            # PortAudio snapshots the devices when it initialises; restart it
+            # so newly plugged-in microphones show up. These are private
+            # sounddevice functions, so only when this version still has them
+            try:
+                sounddevice._terminate()
+                sounddevice._initialize()
+            except Exception as e:
+                print(f"Could not restart PortAudio: {e}")
+        microphones = [{"value": "default", "label": "Default Microphone"}]
+        seen = set()
+        for device in sounddevice.query_devices():
+            name = device["name"]
+            if device["max_input_channels"] > 0 and name not in seen:
+                seen.add(name)
+                microphones.append({"value": name, "label": name})
+    except Exception as e:
+        print(f"Could not enumerate microphones: {e}")
+        return None
+    return microphones
+
+def enumerate_microphones(refresh=False, if_stale=False):
+    """Query the system's input devices and cache them for MIC_CACHE_TTL and on disk"""
+    with _mic_lock:
+        # Another thread may have enumerated while this one waited for the lock
+        if if_stale and time.monotonic() < _mic_cache['expires']:
+            return
+        microphones = query_microphones(refresh)
+        _mic_cache['expires'] = time.monotonic() + MIC_CACHE_TTL
+        if microphones is None:
+            return
+        cache_microphones(microphones)
+    
+    try:
+        with MIC_CACHE_FILE.open('wb') as f:
+            f.write(_mic_cache['body'])
+    except OSError as e:
+        print(f"Could not cache microphone list: {e}")
+
+def get_microphones(refresh=False):
+    """Return the microphone list, re-enumerating inline on refresh.
+
+    A list older than MIC_CACHE_TTL is still returned as is, and refreshed
+    in the background for the next lookup.
+    """
+    if refresh:
+        enumerate_microphones(refresh=True)
+    elif time.monotonic() >= _mic_cache['expires'] and not _mic_lock.locked():
+        threading.Thread(target=enumerate_microphones, kwargs={'if_stale': True}, daemon=True).start()
+    return _mic_cache['data']
+
+# Serve the last enumeration straight away; WebTalkSettingsApp refreshes it
+# in the background on start-up
+_mic_cache = {'expires': time.monotonic() + MIC_CACHE_TTL}
+_mic_lock = threading.Lock()
+cache_microphones(load_cached_microphones())
+
+def import_requests():
+    """Import requests on first use"""
+    global _requests
+    if _requests is None:
+        import requests
+        _requests = requests
+    return _requests
+
+def vendor_asset(name):
+    """Return the local copy of a vendored asset, downloading it on first use"""
+    url = vendor_url(name)
+    if url is None:
+        return None
+    path = VENDOR_DIR / name
+    if path.is_file():
+        return path
+    
+    requests = import_requests()
+    # Google Fonts tailors the CSS to the browser, so ask as the webview
+    headers = {'User-Agent': request.headers.get('User-Agent', '')}
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Could not download {url}: {e}")
+        return None
+    
+    data = response.content
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if name.endswith(".css"):
+        # Point the font URLs at this route so the fonts are cached too
+        data = data.replace(FONT_FILES_URL.encode(), b"/vendor/fonts/")
+        write_file_atomic(path.with_name(path.name + ".gz"), gzip.compress(data, compresslevel=9))
+    write_file_atomic(path, data)
+    return path
+
+def update_server_config():
+    """Send updated config to running server"""
+    global _session
+    requests = import_requests()
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=1)
+        _session.mount('http://', adapter)
+    try:
+        # Fail fast when nothing is listening, but leave the read timeout
+        # alone since the server reloads the model before it answers
+        response = _session.post(
+            f"{SERVER_URL}/config",
+            json=CFG,
+            timeout=(2, 5),
+            stream=True
+        )
+        with response:
+            if response.status_code == 200:
+                return "running"
+            else:
+                return "restart_needed"
+    except requests.exceptions.RequestException:
+        return "not_running"
+
+def apply_settings(body):
+    """Store settings posted as a JSON body, save them and pass them on to the server"""
+    global _config_body
+    try:
+        # Update config with new values
+        CFG.update(decode_settings(body))
+        _config_body = encode_config()
         
-        # Default configuration
-        self.config = {
-            "compute_engine": "gpu",
-            "model": "base",
-            "microphone": "default",
-            "server_port": 8000,
-            "auth_key": "",
-            "openai_api_key": ""
-        }
+        # Save to file
+        save_config()
         
-        self.load_config()
-        self.app = Flask(__name__)
-        self.setup_routes()
+        # Try to update running server
+        server_status = update_server_config()
         
-    def load_config(self):
-        """Load configuration from file"""
+        return {
+            "success": True,
+            "message": "Settings saved successfully!",
+            "server_status": server_status
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error saving settings: {str(e)}"
+        }
+
+class SettingsAPI:
+    """Exposed to the page as window.pywebview.api, so the settings calls
+    inside the desktop window skip the HTTP round trip to the Flask routes"""
+    def bootstrap(self):
+        """Same as GET /api/bootstrap"""
+        return {"config": CFG, "microphones": get_microphones()}
+    
+    def get_microphones(self, refresh=False):
+        """Same as GET /api/microphones"""
+        return get_microphones(refresh)
+    
+    def save_settings(self, data):
+        """Same as POST /api/config"""
+        return apply_settings(dumps_json(data))
+
+app = Flask(__name__)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = VENDOR_MAX_AGE
+
+@lru_cache(maxsize=None)
+def index_page():
+    """The settings page, rendered, encoded and gzipped once.
+
+    It doesn't depend on the config (the JS loads it from /api/bootstrap).
+    """
+    return compress_page(app.jinja_env.from_string(INDEX_HTML).render(models=MODELS))
+
+def send_page(page):
+    """Serve a page from compress_page(), gzipped when the client accepts it"""
+    html, html_gz, etag = page
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resp = app.response_class(html_gz, mimetype='text/html')
+        resp.headers['Content-Encoding'] = 'gzip'
+    else:
+        resp = app.response_class(html, mimetype='text/html')
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers.update(NO_CACHE_HEADERS)
+    return resp.make_conditional(request)
+
+@app.route('/')
+def index():
+    """Serve the main settings page"""
+    return send_page(index_page())
+
+@app.route('/api/config', methods=['GET'])
+def get_config():
+    """Get current configuration, or a 304 if the client's copy is current"""
+    body, etag = _config_body
+    resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, must-revalidate'
+    return resp.make_conditional(request)
+
+@app.route('/api/config', methods=['POST'])
+def save_settings():
+    """Save settings from the UI"""
+    result = apply_settings(request.get_data(cache=False))
+    return json_response(result, status=200 if result["success"] else 500)
+
+@app.route('/api/microphones', methods=['GET'])
+def microphones_route():
+    """Get available microphones, re-enumerating when stale or on ?refresh=1"""
+    refresh = request.args.get('refresh') == '1'
+    get_microphones(refresh)
+    body_gz = _mic_cache['body_gz']
+    if body_gz is not None and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resp = Response(body_gz, mimetype='application/json')
+        resp.headers['Content-Encoding'] = 'gzip'
+    else:
+        resp = Response(_mic_cache['body'], mimetype='application/json')
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-store' if refresh else f'max-age={MIC_CACHE_TTL}'
+    return resp
+
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """Everything the page needs on load, in one round trip"""
+    return json_response({
+        "config": CFG,
+        "microphones": get_microphones()
+    })
+
+@app.route('/vendor/<path:name>')
+def serve_vendor(name):
+    """Serve a vendored stylesheet or font, falling back to its CDN"""
+    url = vendor_url(name)
+    if url is None:
+        return '', 404
+    path = vendor_asset(name)
+    if path is None:
+        return redirect(url)
+    
+    gz_path = path.with_name(path.name + ".gz")
+    if 'gzip' in request.headers.get('Accept-Encoding', '') and gz_path.is_file():
+        resp = send_file(gz_path, mimetype='text/css', max_age=VENDOR_MAX_AGE)
+        resp.headers['Content-Encoding'] = 'gzip'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        return resp
+    return send_file(path, max_age=VENDOR_MAX_AGE)
+
+@app.route('/WebTalk.png')
+def serve_logo():
+    """Serve the WebTalk logo"""
+    logo_path = IMAGES_DIR / "WebTalk.png"
+    if logo_path.exists():
+        return send_file(logo_path, mimetype='image/png')
+    else:
+        return '', 404
+
+@app.route('/Robot.png')
+def serve_robot():
+    """Serve the DeskTalk robot illustration"""
+    robot_path = IMAGES_DIR / "Robot.png"
+    if robot_path.exists():
+        return send_file(robot_path, mimetype='image/png')
+    return '', 404
+
+@lru_cache(maxsize=None)
+def win32_api():
+    """Load the Windows DLLs used for the window once per process, with
+    argtypes/restype declared so calls skip ctypes' argument guessing"""
+    import ctypes
+    from ctypes import wintypes
+    from types import SimpleNamespace
+    
+    user32 = ctypes.WinDLL("user32")
+    shell32 = ctypes.WinDLL("shell32")
+    dwmapi = ctypes.WinDLL("dwmapi")
+    
+    user32.GetSystemMetrics.argtypes = [ctypes.c_int]
+    user32.GetSystemMetrics.restype = ctypes.c_int
+    user32.LoadImageW.argtypes = [wintypes.HINSTANCE, wintypes.LPCWSTR, wintypes.UINT, ctypes.c_int, ctypes.c_int, wintypes.UINT]
+    user32.LoadImageW.restype = wintypes.HANDLE
+    user32.SendMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.SendMessageW.restype = wintypes.LPARAM
+    user32.SetClassLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, ctypes.c_ssize_t]
+    user32.SetClassLongPtrW.restype = ctypes.c_size_t
+    user32.SetWindowPos.argtypes = [wintypes.HWND, wintypes.HWND, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.UINT]
+    user32.SetWindowPos.restype = wintypes.BOOL
+    shell32.SetCurrentProcessExplicitAppUserModelID.argtypes = [wintypes.LPCWSTR]
+    shell32.SetCurrentProcessExplicitAppUserModelID.restype = ctypes.c_long
+    dwmapi.DwmSetWindowAttribute.argtypes = [wintypes.HWND, wintypes.DWORD, ctypes.c_void_p, wintypes.DWORD]
+    dwmapi.DwmSetWindowAttribute.restype = ctypes.c_long
+    
+    return SimpleNamespace(ctypes=ctypes, wintypes=wintypes, user32=user32, shell32=shell32, dwmapi=dwmapi)
+
+class WebTalkSettingsApp:
+    """Desktop launcher: serves the module-level app inside a pywebview window"""
+    def __init__(self):
+        self.app = app
+        self.config = CFG
+        # Refresh the cached microphone list in the background, since
+        # initialising the audio subsystem can take hundreds of ms
+        threading.Thread(target=enumerate_microphones, daemon=True).start()
+
+    def serve(self):
+        """Serve the Flask app on a small fixed thread pool"""
         try:
-            if self.config_file.exists():
-                with self.config_file.open('r') as f:
-                    saved_config = json.load(f)
-                    self.config.update(saved_config)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            
-    def save_config(self):
-        """Save configuration to file"""
+            from waitress import serve
+        except ImportError:
+            print("waitress not installed, using the Flask development server")
+            self.app.run(host=HOST, port=PORT, debug=False, use_reloader=False, threaded=True)
+            return
+        # A handful of threads covers the page, API and asset requests made
+        # together at load without oversubscribing a desktop app
+        serve(self.app, host=HOST, port=PORT, threads=4, connection_limit=32, channel_timeout=15)
+
+    def run(self):
+        """Start the Flask app and create the webview window"""
+        # Set application user model ID early to separate from Python
         try:
-            with self.config_file.open('w') as f:
-                json.dump(self.config, f, indent=2)
+            win32_api().shell32.SetCurrentProcessExplicitAppUserModelID("WebTalk.SettingsApp.1.0")
+            print("Early application ID set successfully!")
         except Exception as e:
-            print(f"Error saving config: {e}")
-            
-    def setup_routes(self):
-        """Setup Flask routes"""
-        
-        @self.app.route('/')
-        def index():
-            """Serve the main settings page"""
-            response = render_template_string(self.get_html_template(), config=self.config)
-            resp = self.app.response_class(response)
-            resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            resp.headers['Pragma'] = 'no-cache'
-            resp.headers['Expires'] = '0'
-            return resp
-        
-        @self.app.route('/desktalk')
-        def desktalk():
-            """Serve the DeskTalk recorder page"""
-            response = render_template_string(self.get_desktalk_template(), config=self.config)
-            resp = self.app.response_class(response)
-            resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            resp.headers['Pragma'] = 'no-cache'
-            resp.headers['Expires'] = '0'
-            return resp
+            print(f"Could not set early application ID: {e}")
         
-        @self.app.route('/api/config', methods=['GET'])
-        def get_config():
-            """Get current configuration"""
-            return jsonify(self.config)
+        # Start Flask in a separate thread
+        flask_thread = threading.Thread(target=self.serve, daemon=True)
+        flask_thread.start()
         
-        @self.app.route('/api/config', methods=['POST'])
-        def save_settings():
-            """Save settings from the UI"""
-            try:
-                data = request.get_json()
-                
-                # Update config with new values
-                self.config.update({
-                    "compute_engine": data.get("compute_engine", "gpu"),
-                    "model": data.get("model", "base"),
-                    "microphone": data.get("microphone", "default"),
-                    "server_port": int(data.get("server_port", 8000)),
-                    "auth_key": data.get("auth_key", ""),
-                    "openai_api_key": data.get("openai_api_key", "")
-                })
-                
-                # Save to file
-                self.save_config()
-                
-                # Try to update running server
-                server_status = self.update_server_config()
-                
-                return jsonify({
-                    "success": True,
-                    "message": "Settings saved successfully!",
-                    "server_status": server_status
-                })
-                
-            except Exception as e:
-                return jsonify({
-                    "success": False,
-                    "message": f"Error saving settings: {str(e)}"
-                }), 500
+        # Open the window as soon as the server accepts connections
+        if wait_for_port(HOST, PORT, STARTUP_TIMEOUT):
+            print("Flask server started successfully!")
+        else:
+            print(f"Flask server did not start within {STARTUP_TIMEOUT}s")
+        print("Creating PyWebView window...")
         
-        @self.app.route('/api/microphones', methods=['GET'])
-        def get_microphones():
-            """Get available microphones"""
-            # This could be expanded to actually detect system microphones
-            return jsonify([
-                {"value": "default", "label": "Default Microphone"},
-                {"value": "mic1", "label": "Microphone 1 (USB)"},
-                {"value": "mic2", "label": "Microphone 2 (Built-in)"}
-            ])
+        # Calculate window dimensions based on screen size
+        # Target: 90% of screen height, with max of 950px (original design height)
+        # Width stays fixed - content will adapt via flexbox
+        MAX_HEIGHT = 950
+        WINDOW_WIDTH = 550
         
-        @self.app.route('/WebTalk.png')
-        def serve_logo():
-            """Serve the WebTalk logo"""
-            from flask import send_file
-            logo_path = IMAGES_DIR / "WebTalk.png"
-            if logo_path.exists():
-                return send_file(logo_path, mimetype='image/png')
-            else:
-                return '', 404
-
-        @self.app.route('/Robot.png')
-        def serve_robot():
-            """Serve the DeskTalk robot illustration"""
-            from flask import send_file
-            robot_path = IMAGES_DIR / "Robot.png"
-            if robot_path.exists():
-                return send_file(robot_path, mimetype='image/png')
-            return '', 404
+        try:
+            # Get screen dimensions using Windows API
+            screen_height = win32_api().user32.GetSystemMetrics(1)  # SM_CYSCREEN
+            print(f"Detected screen height: {screen_height}px")
+            
+            # Calculate 90% of screen height, capped at MAX_HEIGHT
+            target_height = min(int(screen_height * 0.9), MAX_HEIGHT)
             
-    def update_server_config(self):
-        """Send updated config to running server"""
+            print(f"Window size: {WINDOW_WIDTH}x{target_height}")
+        except Exception as e:
+            print(f"Could not get screen dimensions, using defaults: {e}")
+            target_height = MAX_HEIGHT
+        
+        # Create and start the webview window
         try:
-            response = requests.post(
-                f"{self.server_url}/config",
-                json=self.config,
-                timeout=5
+            window = webview.create_window(
+                'WebTalk Server Settings',
+                f'http://{HOST}:{PORT}',
+                width=WINDOW_WIDTH,
+                height=target_height,
+                resizable=True,
+                shadow=True,
+                on_top=False,  # Allow window to go behind other windows
+                minimized=False,
+                hidden=True,  # shown once the page has loaded, avoiding a blank first paint
+                background_color='#0f172a',  # Match the app background
+                js_api=SettingsAPI(),
+                text_select=False
             )
-            if response.status_code == 200:
-                return "running"
-            else:
-                return "restart_needed"
-        except requests.exceptions.RequestException:
-            return "not_running"
-    
-    def get_html_template(self):
-        """Return the HTML template with embedded CSS and JavaScript"""
-        return '''
+            
+            # Set up dark title bar and icon after window is shown
+            def set_window_properties():
+                try:
+                    from webview.platforms.winforms import BrowserView
+                    win32 = win32_api()
+                    ctypes, wintypes = win32.ctypes, win32.wintypes
+                    
+                    # Get window handle
+                    window_handle = BrowserView.instances[window.uid].Handle.ToInt32()
+                    
+                    # Set application user model ID to separate from Python
+                    try:
+                        win32.shell32.SetCurrentProcessExplicitAppUserModelID("WebTalk.SettingsApp.1.0")
+                        print("Application ID set successfully!")
+                    except:
+                        pass
+                    
+                    # Set dark title bar
+                    win32.dwmapi.DwmSetWindowAttribute(
+                        window_handle,
+                        20,  # DWMWA_USE_IMMERSIVE_DARK_MODE
+                        ctypes.byref(wintypes.BOOL(True)),
+                        ctypes.sizeof(wintypes.BOOL),
+                    )
+                    print("Dark title bar applied successfully!")
+                    
+                    # Set custom icon
+                    icon_path = IMAGES_DIR / "WebTalk.ico"
+                    if icon_path.exists():
+                        user32 = win32.user32
+                        
+                        # Load icon with multiple sizes
+                        hicon_small = user32.LoadImageW(
+                            None, 
+                            str(icon_path), 
+                            1,  # IMAGE_ICON
+                            16, 16,  # Small icon size
+                            0x00000010  # LR_LOADFROMFILE
+                        )
+                        hicon_large = user32.LoadImageW(
+                            None, 
+                            str(icon_path), 
+                            1,  # IMAGE_ICON
+                            32, 32,  # Large icon size
+                            0x00000010  # LR_LOADFROMFILE
+                        )
+                        
+                        if hicon_small and hicon_large:
+                            # Set window icons
+                            user32.SendMessageW(window_handle, 0x0080, 0, hicon_small)  # WM_SETICON, ICON_SMALL
+                            user32.SendMessageW(window_handle, 0x0080, 1, hicon_large)  # WM_SETICON, ICON_BIG
+                            
+                            # Set class icon for taskbar
+                            user32.SetClassLongPtrW(window_handle, -14, hicon_small)  # GCL_HICONSM
+                            user32.SetClassLongPtrW(window_handle, -34, hicon_large)  # GCL_HICON
+                            
+                            # Force taskbar to update
+                            user32.SetWindowPos(window_handle, 0, 0, 0, 0, 0, 0x0020 | 0x0004 | 0x0001)  # SWP_FRAMECHANGED | SWP_NOZORDER | SWP_NOSIZE
+                            
+                            print("Custom icon applied successfully!")
+                        else:
+                            print("Failed to load icon file")
+                    else:
+                        print(f"Icon file not found: {icon_path}")
+                        
+                except Exception as e:
+                    print(f"Could not apply window properties: {e}")
+            
+            # Apply window properties when window is shown
+            window.events.shown += set_window_properties
+            window.events.loaded += window.show
+            
+            print("Starting PyWebView...")
+            webview.start(debug=False, private_mode=False)  # Disable debug to prevent DevTools window
+            print("PyWebView window closed.")
+        except Exception as e:
+            print(f"Error starting webview: {e}")
+            print(f"Flask server is running at http://{HOST}:{PORT}")
+            print("You can open this URL in your browser as a fallback.")
+            # Keep the Flask server running
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                print("Settings app stopped.")
+
+# Settings page template, rendered once by index_page(); the JS fills the form from /api/bootstrap
+INDEX_HTML = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="utf-8"/>
     <meta content="width=device-width, initial-scale=1.0" name="viewport"/>
     <title>WebTalk Server Settings</title>
-    <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet"/>
-    <link href="https://fonts.googleapis.com/css2?family=Material+Icons" rel="stylesheet"/>
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;700&display=swap" rel="stylesheet"/>
+    <link href="/vendor/tailwind.min.css" rel="stylesheet"/>
+    <link href="/vendor/material-icons.css" rel="stylesheet"/>
+    <link href="/vendor/roboto.css" rel="stylesheet"/>
                     <style>
         :root {
             --wt-bg: #0f172a;
@@ -266,63 +806,291 @@ class WebTalkSettingsApp:
             display: flex;
         }
 
-        .tab-content iframe {
-            flex: 1;
-            min-height: 0;
+        /* DeskTalk tab */
+        #desktalk-tab {
+            --wt-surface: rgba(17, 24, 39, 0.92);
+            --wt-panel: rgba(15, 23, 42, 0.88);
+            --wt-border: rgba(148, 163, 184, 0.18);
+            --wt-border-strong: rgba(148, 163, 184, 0.28);
+            --wt-text-muted: rgba(226, 232, 240, 0.68);
         }
 
-        .input-group {
-            margin-bottom: 20px;
-        }
-        .input-group label {
-            display: block;
-            font-size: 0.875rem;
-            font-weight: 500;
-            margin-bottom: 8px;
-            color: var(--wt-text-muted);
+        #desktalk-tab * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
         }
-        .input-field, .select-field {
+
+        #desktalk-tab .desk-container {
+            position: relative;
+            flex: 1;
+            min-height: 0;
             width: 100%;
-            padding: 12px;
-            border-radius: 10px;
-            background-color: rgba(15, 23, 42, 0.85);
-            border: 1px solid var(--wt-border);
-            color: var(--wt-text);
-            font-size: 0.9rem;
-            transition: background-color 0.3s, border-color 0.3s, box-shadow 0.3s;
+            background: var(--wt-surface);
+            border-radius: 12px;
+            padding: 8px;
+            border: none;
+            box-shadow: none;
+            display: flex;
+            flex-direction: column;
+            gap: 8px;
+            overflow: hidden;
             box-sizing: border-box;
-            box-shadow: 0 10px 24px rgba(8, 11, 21, 0.35);
         }
-        .input-field:focus, .select-field:focus {
-            outline: none;
-            background-color: rgba(15, 23, 42, 0.95);
-            border-color: rgba(59, 130, 246, 0.6);
-            box-shadow: 0 12px 28px rgba(37, 99, 235, 0.32);
+
+        #desktalk-tab .desk-header {
+            text-align: center;
+            margin-bottom: 0;
+            flex-shrink: 0;
         }
-        .input-field::placeholder {
+
+        #desktalk-tab .desk-title {
+            font-size: 1.2rem;
+            font-weight: 700;
+            color: var(--wt-heading);
+            margin: 0;
+        }
+
+        #desktalk-tab .desk-subtitle {
+            margin-top: 2px;
+            font-size: 0.75rem;
             color: var(--wt-text-muted);
         }
-        .select-field option {
-            color: #0f172a;
+
+        #desktalk-tab .desk-body {
+            flex: 1;
+            display: flex;
+            flex-direction: column;
+            gap: 8px;
+            min-height: 0;
         }
-        .btn {
-            padding: 12px 24px;
-            border-radius: 10px;
-            font-weight: 600;
-            font-size: 0.95rem;
-            cursor: pointer;
-            transition: transform 0.2s, box-shadow 0.3s, filter 0.3s;
+
+        #desktalk-tab .record-area {
             display: flex;
+            flex-direction: column;
             align-items: center;
             justify-content: center;
-            border: none;
-            width: 100%;
-            letter-spacing: 0.01em;
-        }
-        .btn-primary {
-            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-accent-soft) 48%, var(--wt-highlight) 100%);
-            color: var(--wt-heading);
-            box-shadow: 0 18px 38px rgba(37, 99, 235, 0.35);
+            gap: 8px;
+            flex-shrink: 0;
+            padding: 8px;
+        }
+
+        #desktalk-tab .record-button {
+            width: 80px;
+            height: 80px;
+            border-radius: 50%;
+            border: none;
+            color: var(--wt-heading);
+            font-size: 1.5rem;
+            font-weight: 600;
+            cursor: pointer;
+            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-accent-soft) 55%, var(--wt-highlight) 100%);
+            box-shadow: 0 15px 30px rgba(37, 99, 235, 0.42);
+            transition: transform 0.25s ease, box-shadow 0.25s ease;
+        }
+
+        #desktalk-tab .record-button:hover {
+            transform: scale(1.05);
+            box-shadow: 0 34px 65px rgba(37, 99, 235, 0.5);
+        }
+
+        #desktalk-tab .record-button.recording {
+            background: linear-gradient(135deg, var(--wt-accent-soft) 0%, var(--wt-accent-deep) 100%);
+            animation: desk-pulse 2.1s infinite;
+        }
+
+        #desktalk-tab .record-button.processing {
+            background: linear-gradient(135deg, var(--wt-highlight) 0%, #0ea371 100%);
+            box-shadow: 0 26px 48px rgba(16, 185, 129, 0.4);
+            cursor: not-allowed;
+        }
+
+        @keyframes desk-pulse {
+            0% { transform: scale(1); box-shadow: 0 28px 55px rgba(37, 99, 235, 0.4); }
+            50% { transform: scale(1.07); box-shadow: 0 34px 70px rgba(59, 130, 246, 0.55); }
+            100% { transform: scale(1); box-shadow: 0 28px 55px rgba(37, 99, 235, 0.4); }
+        }
+
+        #desktalk-tab .control-row {
+            display: flex;
+            gap: 12px;
+            justify-content: center;
+            width: min(280px, 100%);
+        }
+
+        #desktalk-tab .control-btn {
+            flex: 1;
+            min-width: 100px;
+            border-radius: 14px;
+            padding: 10px 14px;
+            font-weight: 600;
+            border: none;
+            cursor: pointer;
+            background: rgba(30, 41, 59, 0.82);
+            color: var(--wt-text);
+            box-shadow: 0 16px 34px rgba(5, 10, 18, 0.45);
+            transition: transform 0.2s ease, box-shadow 0.2s ease, background 0.2s ease;
+        }
+
+        #desktalk-tab .control-btn:hover {
+            transform: translateY(-2px);
+            background: rgba(37, 99, 235, 0.22);
+            box-shadow: 0 20px 40px rgba(5, 10, 18, 0.5);
+        }
+
+        #desktalk-tab .control-btn.primary {
+            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-highlight) 100%);
+            color: var(--wt-heading);
+        }
+
+        #desktalk-tab .status-message {
+            text-align: center;
+            font-size: 0.8rem;
+            color: var(--wt-text-muted);
+            min-height: 18px;
+        }
+
+        #desktalk-tab .transcription-card {
+            padding: 10px;
+            border-radius: 12px;
+            background: var(--wt-panel);
+            border: 1px solid var(--wt-border);
+            box-shadow: inset 0 0 0 1px rgba(59, 130, 246, 0.08);
+            flex: 1;
+            position: relative;
+            display: flex;
+            flex-direction: column;
+            gap: 5px;
+            overflow: hidden;
+            min-height: 0;
+        }
+
+        #desktalk-tab .transcription-placeholder {
+            text-align: center;
+            font-style: italic;
+            color: var(--wt-text-muted);
+            margin: auto;
+            padding: 0 12px;
+        }
+
+        #desktalk-tab .transcription-text {
+            line-height: 1.6;
+            font-size: 1rem;
+            cursor: context-menu;
+            flex: 1;
+            overflow-y: auto;
+            padding-right: 4px;
+        }
+
+        #desktalk-tab .hint {
+            margin-top: auto;
+            text-align: left;
+            font-size: 0.8rem;
+            color: var(--wt-text-muted);
+            display: flex;
+            flex-direction: row;
+            align-items: flex-end;
+            justify-content: space-between;
+            gap: 12px;
+            padding: 8px 6px 12px;
+        }
+
+        #desktalk-tab .hint .hint-text {
+            align-self: flex-end;
+        }
+
+        #desktalk-tab .hint .robot-illustration {
+            width: 150px;
+            opacity: 0.95;
+            pointer-events: none;
+        }
+
+        #desktalk-tab .alert {
+            position: absolute;
+            bottom: 20px;
+            left: 20px;
+            right: 20px;
+            padding: 14px 16px;
+            border-radius: 12px;
+            font-size: 0.9rem;
+            display: none;
+            z-index: 100;
+        }
+
+        #desktalk-tab .alert.error {
+            background: rgba(248, 113, 113, 0.12);
+            border: 1px solid rgba(248, 113, 113, 0.4);
+            color: var(--wt-danger);
+        }
+
+        #desktalk-tab .alert.success {
+            background: rgba(16, 185, 129, 0.16);
+            border: 1px solid rgba(16, 185, 129, 0.38);
+            color: var(--wt-highlight);
+        }
+
+        @media (max-width: 520px) {
+            #desktalk-tab .desk-container {
+                padding: 28px 20px;
+            }
+
+            #desktalk-tab .control-row {
+                flex-direction: column;
+            }
+        }
+
+        .input-group {
+            margin-bottom: 20px;
+        }
+        .input-group label {
+            display: block;
+            font-size: 0.875rem;
+            font-weight: 500;
+            margin-bottom: 8px;
+            color: var(--wt-text-muted);
+        }
+        .input-field, .select-field {
+            width: 100%;
+            padding: 12px;
+            border-radius: 10px;
+            background-color: rgba(15, 23, 42, 0.85);
+            border: 1px solid var(--wt-border);
+            color: var(--wt-text);
+            font-size: 0.9rem;
+            transition: background-color 0.3s, border-color 0.3s, box-shadow 0.3s;
+            box-sizing: border-box;
+            box-shadow: 0 10px 24px rgba(8, 11, 21, 0.35);
+        }
+        .input-field:focus, .select-field:focus {
+            outline: none;
+            background-color: rgba(15, 23, 42, 0.95);
+            border-color: rgba(59, 130, 246, 0.6);
+            box-shadow: 0 12px 28px rgba(37, 99, 235, 0.32);
+        }
+        .input-field::placeholder {
+            color: var(--wt-text-muted);
+        }
+        .select-field option {
+            color: #0f172a;
+        }
+        .btn {
+            padding: 12px 24px;
+            border-radius: 10px;
+            font-weight: 600;
+            font-size: 0.95rem;
+            cursor: pointer;
+            transition: transform 0.2s, box-shadow 0.3s, filter 0.3s;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            border: none;
+            width: 100%;
+            letter-spacing: 0.01em;
+        }
+        .btn-primary {
+            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-accent-soft) 48%, var(--wt-highlight) 100%);
+            color: var(--wt-heading);
+            box-shadow: 0 18px 38px rgba(37, 99, 235, 0.35);
         }
         .btn-primary:hover {
             transform: translateY(-1px);
@@ -453,7 +1221,7 @@ class WebTalkSettingsApp:
                 <div class="toggle-switch-container">
                     <span class="toggle-label">CPU</span>
                     <label class="toggle-switch">
-                        <input id="compute-engine-toggle" type="checkbox" {{ 'checked' if config.compute_engine == 'gpu' else '' }}/>
+                        <input id="compute-engine-toggle" type="checkbox"/>
                         <span class="slider round"></span>
                     </label>
                     <span class="toggle-label">GPU</span>
@@ -465,14 +1233,9 @@ class WebTalkSettingsApp:
                 <div class="icon-input-group">
                     <span class="material-icons">tune</span>
                     <select class="select-field" id="model-selector">
-                        <option value="tiny" {{ 'selected' if config.model == 'tiny' else '' }}>Tiny</option>
-                        <option value="base" {{ 'selected' if config.model == 'base' else '' }}>Base</option>
-                        <option value="small" {{ 'selected' if config.model == 'small' else '' }}>Small</option>
-                        <option value="medium" {{ 'selected' if config.model == 'medium' else '' }}>Medium</option>
-                        <option value="large" {{ 'selected' if config.model == 'large' else '' }}>Large</option>
-                        <option value="large-v2" {{ 'selected' if config.model == 'large-v2' else '' }}>Large-v2</option>
-                        <option value="large-v3" {{ 'selected' if config.model == 'large-v3' else '' }}>Large-v3</option>
-                        <option value="turbo" {{ 'selected' if config.model == 'turbo' else '' }}>Turbo</option>
+                        {% for value, label in models %}
+                        <option value="{{ value }}">{{ label }}</option>
+                        {% endfor %}
                     </select>
                 </div>
             </div>
@@ -482,9 +1245,7 @@ class WebTalkSettingsApp:
                 <div class="icon-input-group">
                     <span class="material-icons">mic</span>
                     <select class="select-field" id="microphone-selector">
-                        <option value="default" {{ 'selected' if config.microphone == 'default' else '' }}>Default Microphone</option>
-                        <option value="mic1" {{ 'selected' if config.microphone == 'mic1' else '' }}>Microphone 1 (USB)</option>
-                        <option value="mic2" {{ 'selected' if config.microphone == 'mic2' else '' }}>Microphone 2 (Built-in)</option>
+                        <option value="default">Default Microphone</option>
                     </select>
                 </div>
             </div>
@@ -502,583 +1263,286 @@ class WebTalkSettingsApp:
         
         <!-- DeskTalk Tab Content -->
         <div id="desktalk-tab" class="tab-content">
-            <iframe src="/desktalk?v=11" style="width: 100%; height: 100%; border: none; border-radius: 12px;"></iframe>
+            <div class="desk-container">
+                <div class="desk-header">
+                    <h1 class="desk-title">DeskTalk</h1>
+                    <p class="desk-subtitle">Desktop voice transcription companion</p>
+                </div>
+
+                <div class="desk-body">
+                    <div class="record-area">
+                        <button class="record-button" id="recordButton">●</button>
+                        <div class="control-row" id="controlRow" style="display: none;">
+                            <button class="control-btn" id="stopButton">Stop</button>
+                            <button class="control-btn primary" id="stopCopyButton">Stop & Copy</button>
+                        </div>
+                        <div class="status-message" id="statusMessage">Click the circle to start recording</div>
+                    </div>
+
+                    <div class="transcription-card" id="transcriptionCard">
+                        <div class="transcription-placeholder" id="transcriptionPlaceholder">
+                            Your transcription will appear here.
+                        </div>
+                        <div class="transcription-text" id="transcriptionText" style="display: none;"></div>
+                        <div class="hint">
+                            <div class="hint-text" style="flex: 1; text-align: left;">Right-click the text to copy</div>
+                            <img src="/Robot.png" class="robot-illustration" alt="Robot holding microphone">
+                        </div>
+                    </div>
+                </div>
+
+                <div class="alert error" id="errorMessage"></div>
+                <div class="alert success" id="successMessage"></div>
+            </div>
         </div>
     </div>
 
     <script>
-        function switchTab(tabName) {
-            console.log('Switching to tab:', tabName);
-            
-            // Hide all tab contents (remove active class)
-            document.querySelectorAll('.tab-content').forEach(tab => {
-                tab.classList.remove('active');
-                console.log('Hiding tab:', tab.id);
-            });
-            
-            // Remove active class from all tab buttons
-            document.querySelectorAll('.tab-button').forEach(btn => {
-                btn.classList.remove('active');
+        (function() {
+            let SERVER_URL = 'http://localhost:8000';
+            // The settings script loads the config and announces it
+            window.addEventListener('webtalk:config', event => {
+                SERVER_URL = `http://localhost:${event.detail.server_port}`;
             });
-            
-            // Show selected tab content (add active class)
-            const targetTab = document.getElementById(tabName + '-tab');
-            if (targetTab) {
-                targetTab.classList.add('active');
-                console.log('Showing tab:', targetTab.id);
-            } else {
-                console.error('Tab not found:', tabName + '-tab');
-            }
-            
-            // Add active class to clicked button
-            const targetButton = document.querySelector('.tab-button[data-tab="' + tabName + '"]');
-            if (targetButton) {
-                targetButton.classList.add('active');
-            }
-            console.log('Tab switch completed');
-        }
-
-        window.switchTab = switchTab;
-
-        function initializeTabs() {
-            console.log('Initializing tab interface');
 
-            // Set up tab button click handlers
-            const tabButtons = document.querySelectorAll('.tab-button');
-            if (tabButtons.length) {
-                tabButtons.forEach(btn => {
-                    const target = btn.getAttribute('data-tab');
-                    if (target) {
-                        btn.addEventListener('click', () => switchTab(target));
-                        btn.setAttribute('role', 'tab');
+            // Captures the microphone as 16 kHz int16 PCM in ~128 ms messages;
+            // a 'flush' message sends the remainder and then 'flushed'
+            const PCM_WORKLET_URL = URL.createObjectURL(new Blob([`
+                class PcmCapture extends AudioWorkletProcessor {
+                    constructor() {
+                        super();
+                        this.buffer = new Int16Array(2048);
+                        this.filled = 0;
+                        this.port.onmessage = () => {
+                            this.send();
+                            this.port.postMessage('flushed');
+                        };
                     }
-                });
+                    send() {
+                        if (this.filled > 0) {
+                            const pcm = this.buffer.slice(0, this.filled);
+                            this.port.postMessage(pcm.buffer, [pcm.buffer]);
+                            this.filled = 0;
+                        }
+                    }
+                    process(inputs) {
+                        const channel = inputs[0][0];
+                        if (channel) {
+                            if (this.filled + channel.length > this.buffer.length) {
+                                this.send();
+                            }
+                            for (let i = 0; i < channel.length; i++) {
+                                this.buffer[this.filled++] = Math.max(-32768, Math.min(32767, channel[i] * 32768));
+                            }
+                        }
+                        return true;
+                    }
+                }
+                registerProcessor('pcm-capture', PcmCapture);
+            `], { type: 'application/javascript' }));
 
-                // Switch to the default tab (DeskTalk)
-                const defaultTab = tabButtons[0].getAttribute('data-tab') || 'desktalk';
-                switchTab(defaultTab);
-                console.log('Default tab activated:', defaultTab);
-            }
-        }
-
-        if (document.readyState === 'loading') {
-            document.addEventListener('DOMContentLoaded', initializeTabs);
-        } else {
-            initializeTabs();
-        }
+            class DeskTalkRecorder {
+                constructor() {
+                    this.isRecording = false;
+                    this.mediaRecorder = null;
+                    this.audioChunks = [];
+                    this.pcm = null;
+                    this.shouldAutoCopy = false;
+                    this.stream = null;
 
-        const saveButton = document.getElementById('save-apply-button');
-        const restartAlert = document.getElementById('restart-alert');
-        const inputs = document.querySelectorAll('.input-field, .select-field, #compute-engine-toggle');
-        
-        let initialValues = {};
-        inputs.forEach(input => {
-            if (input.type === 'checkbox') {
-                initialValues[input.id] = input.checked;
-            } else {
-                initialValues[input.id] = input.value;
-            }
-        });
+                    this.recordButton = document.getElementById('recordButton');
+                    this.controlRow = document.getElementById('controlRow');
+                    this.stopButton = document.getElementById('stopButton');
+                    this.stopCopyButton = document.getElementById('stopCopyButton');
+                    this.statusMessage = document.getElementById('statusMessage');
+                    this.transcriptionPlaceholder = document.getElementById('transcriptionPlaceholder');
+                    this.transcriptionText = document.getElementById('transcriptionText');
+                    this.transcriptionCard = document.getElementById('transcriptionCard');
+                    this.errorMessage = document.getElementById('errorMessage');
+                    this.successMessage = document.getElementById('successMessage');
 
-        const checkForChanges = () => {
-            let changed = false;
-            inputs.forEach(input => {
-                const currentValue = input.type === 'checkbox' ? input.checked : input.value;
-                if (currentValue !== initialValues[input.id]) {
-                    changed = true;
+                    this.bindEvents();
                 }
-            });
-            return changed;
-        };
 
-        saveButton.addEventListener('click', async () => {
-            try {
-                const computeToggle = document.getElementById('compute-engine-toggle');
-                const data = {
-                    compute_engine: computeToggle.checked ? 'gpu' : 'cpu',
-                    model: document.getElementById('model-selector').value,
-                    microphone: document.getElementById('microphone-selector').value
-                };
-                
-                console.log('Toggle checked:', computeToggle.checked);
-                console.log('Compute engine:', data.compute_engine);
-                console.log('Saving configuration:', data);
+                bindEvents() {
+                    this.recordButton.addEventListener('click', () => {
+                        if (this.isRecording) {
+                            this.stopRecording();
+                        } else {
+                            this.startRecording();
+                        }
+                    });
 
-                const response = await fetch('/api/config', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(data)
-                });
+                    this.stopButton.addEventListener('click', () => this.stopRecording());
+                    this.stopCopyButton.addEventListener('click', () => {
+                        this.shouldAutoCopy = true;
+                        this.stopRecording();
+                    });
 
-                const result = await response.json();
-                
-                if (result.success) {
-                    if (checkForChanges() || result.server_status !== 'running') {
-                        restartAlert.style.display = 'block';
-                        restartAlert.innerHTML = '<span class="material-icons text-sm mr-1 align-middle">warning</span> Restart server for changes to take effect.';
-                    } else {
-                        restartAlert.style.display = 'block';
-                        restartAlert.innerHTML = '<span class="material-icons text-sm mr-1 align-middle">check_circle</span> Settings saved successfully!';
-                        restartAlert.style.color = '#34D399';
-                    }
-                    
-                    // Update initial values
-                    inputs.forEach(input => {
-                        if (input.type === 'checkbox') {
-                            initialValues[input.id] = input.checked;
-                        } else {
-                            initialValues[input.id] = input.value;
+                    // The microphone stream is kept between recordings and released with the page
+                    window.addEventListener('beforeunload', () => {
+                        if (this.stream) {
+                            this.stream.getTracks().forEach(track => track.stop());
                         }
                     });
-                } else {
-                    alert('Error saving settings: ' + result.message);
-                }
-            } catch (error) {
-                alert('Error saving settings: ' + error.message);
-            }
-        });
 
-        // Hide restart alert if no changes are made on subsequent clicks
-        inputs.forEach(input => {
-            input.addEventListener('change', () => {
-                if (!checkForChanges()) {
-                    restartAlert.style.display = 'none';
+                    this.transcriptionCard.addEventListener('contextmenu', (event) => {
+                        event.preventDefault();
+                        if (this.transcriptionText.style.display === 'none') {
+                            return;
+                        }
+                        this.copyTranscription();
+                    });
                 }
-            });
-        });
 
-        // Handle compute engine toggle
-        const computeToggle = document.getElementById('compute-engine-toggle');
-        if (computeToggle) {
-            computeToggle.addEventListener('change', () => {
-                const selectedEngine = computeToggle.checked ? 'GPU' : 'CPU';
-                console.log('Compute Engine set to:', selectedEngine);
 
-                if (initialValues[computeToggle.id] !== computeToggle.checked) {
-                    restartAlert.style.display = 'block';
-                } else if (!checkForChanges()) {
-                    restartAlert.style.display = 'none';
+                updateStatus(message) {
+                    this.statusMessage.textContent = message;
                 }
-            });
-        }
-</script>
-</body>
-</html>
-        '''
-    def get_desktalk_template(self):
-        return """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8"/>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
-    <title>DeskTalk Recorder</title>
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;700&display=swap" rel="stylesheet"/>
-    <style>
-        :root {
-            --wt-bg: #0f172a;
-            --wt-surface: rgba(17, 24, 39, 0.92);
-            --wt-panel: rgba(15, 23, 42, 0.88);
-            --wt-border: rgba(148, 163, 184, 0.18);
-            --wt-border-strong: rgba(148, 163, 184, 0.28);
-            --wt-text: #e2e8f0;
-            --wt-text-muted: rgba(226, 232, 240, 0.68);
-            --wt-heading: #f8fafc;
-            --wt-accent: #2563eb;
-            --wt-accent-soft: #3b82f6;
-            --wt-accent-deep: #1d4ed8;
-            --wt-highlight: #10b981;
-            --wt-danger: #f87171;
-        }
-
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
 
-        html {
-            height: 100%;
-            overflow: hidden;
-        }
+                resetAlerts() {
+                    this.errorMessage.style.display = 'none';
+                    this.successMessage.style.display = 'none';
+                }
 
-        body {
-            font-family: 'Roboto', sans-serif;
-            background: radial-gradient(circle at 35% 15%, #111c2e 0%, #0b1324 55%, #050a18 100%);
-            height: 100%;
-            margin: 0;
-            padding: 0;
-            display: flex;
-            align-items: stretch;
-            justify-content: stretch;
-            color: var(--wt-text);
-            overflow: hidden;
-        }
+                showError(message) {
+                    this.errorMessage.textContent = message;
+                    this.errorMessage.style.display = 'block';
+                    this.successMessage.style.display = 'none';
+                }
 
-        .desk-container {
-            position: relative;
-            height: 100%;
-            width: 100%;
-            background: var(--wt-surface);
-            border-radius: 0;
-            padding: 8px;
-            border: none;
-            box-shadow: none;
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-            overflow: hidden;
-            box-sizing: border-box;
-        }
+                showSuccess(message) {
+                    this.successMessage.textContent = message;
+                    this.successMessage.style.display = 'block';
+                    this.errorMessage.style.display = 'none';
+                }
 
-        .desk-header {
-            text-align: center;
-            margin-bottom: 0;
-            flex-shrink: 0;
-        }
+                async startRecording() {
+                    this.resetAlerts();
+                    try {
+                        if (!this.stream) {
+                            this.stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+                        }
 
-        .desk-title {
-            font-size: 1.2rem;
-            font-weight: 700;
-            color: var(--wt-heading);
-            margin: 0;
-        }
+                        try {
+                            await this.startPcmStream();
+                        } catch (error) {
+                            // Older servers and webviews: record and upload a WebM file
+                            console.warn('PCM streaming unavailable:', error);
+                            this.startMediaRecorder();
+                        }
+                        this.isRecording = true;
+                        this.recordButton.classList.add('recording');
+                        this.recordButton.textContent = '●';
+                        this.updateStatus('Recording... speak naturally');
+                        this.controlRow.style.display = 'flex';
+                    } catch (error) {
+                        this.showError(`Could not start recording: ${error.message}`);
+                        this.updateStatus('Ready when you are');
+                        if (this.stream) {
+                            this.stream.getTracks().forEach(track => track.stop());
+                            this.stream = null;
+                        }
+                    }
+                }
 
-        .desk-subtitle {
-            margin-top: 2px;
-            font-size: 0.75rem;
-            color: var(--wt-text-muted);
-        }
+                startMediaRecorder() {
+                    this.audioChunks = [];
+                    this.mediaRecorder = new MediaRecorder(this.stream, { mimeType: 'audio/webm' });
 
-        .desk-body {
-            flex: 1;
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-            min-height: 0;
-        }
+                    this.mediaRecorder.addEventListener('dataavailable', event => {
+                        if (event.data.size > 0) {
+                            this.audioChunks.push(event.data);
+                        }
+                    });
 
-        .record-area {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            gap: 8px;
-            flex-shrink: 0;
-            padding: 8px;
-        }
+                    this.mediaRecorder.addEventListener('stop', () => {
+                        this.processRecording(() => this.uploadRecording());
+                    });
 
-        .record-button {
-            width: 80px;
-            height: 80px;
-            border-radius: 50%;
-            border: none;
-            color: var(--wt-heading);
-            font-size: 1.5rem;
-            font-weight: 600;
-            cursor: pointer;
-            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-accent-soft) 55%, var(--wt-highlight) 100%);
-            box-shadow: 0 15px 30px rgba(37, 99, 235, 0.42);
-            transition: transform 0.25s ease, box-shadow 0.25s ease;
-        }
+                    this.mediaRecorder.start();
+                }
 
-        .record-button:hover {
-            transform: scale(1.05);
-            box-shadow: 0 34px 65px rgba(37, 99, 235, 0.5);
-        }
+                async startPcmStream() {
+                    // Raw PCM goes straight to the server as it is captured,
+                    // skipping the Opus encode here and the decode there
+                    const socket = new WebSocket(`${SERVER_URL.replace(/^http/, 'ws')}/transcribe_ws`);
+                    await new Promise((resolve, reject) => {
+                        socket.onopen = resolve;
+                        socket.onerror = () => reject(new Error('Could not connect to the server'));
+                    });
 
-        .record-button.recording {
-            background: linear-gradient(135deg, var(--wt-accent-soft) 0%, var(--wt-accent-deep) 100%);
-            animation: pulse 2.1s infinite;
-        }
+                    const context = new AudioContext({ sampleRate: 16000 });
+                    try {
+                        await context.audioWorklet.addModule(PCM_WORKLET_URL);
+                        const source = context.createMediaStreamSource(this.stream);
+                        const node = new AudioWorkletNode(context, 'pcm-capture');
+                        node.port.onmessage = event => {
+                            if (socket.readyState === WebSocket.OPEN) {
+                                socket.send(event.data === 'flushed' ? 'stop' : event.data);
+                            }
+                        };
+                        source.connect(node);
+                        const pcm = { socket, context, source, node, reply: null };
+                        // Listen from the start: the server may reply with an error
+                        // and close the socket mid-recording (too long, restarted),
+                        // which ends the recording with that error
+                        pcm.result = new Promise((resolve, reject) => {
+                            socket.onmessage = event => {
+                                pcm.reply = JSON.parse(event.data);
+                                resolve(pcm.reply);
+                                if (this.pcm === pcm) {
+                                    this.stopRecording();
+                                }
+                            };
+                            socket.onclose = () => {
+                                reject(new Error('Connection to the server was lost'));
+                                if (this.pcm === pcm) {
+                                    this.stopRecording();
+                                }
+                            };
+                        });
+                        // Handled by finishPcmStream; don't report it as unhandled meanwhile
+                        pcm.result.catch(() => {});
+                        this.pcm = pcm;
+                    } catch (error) {
+                        context.close();
+                        socket.close();
+                        throw error;
+                    }
+                }
 
-        .record-button.processing {
-            background: linear-gradient(135deg, var(--wt-highlight) 0%, #0ea371 100%);
-            box-shadow: 0 26px 48px rgba(16, 185, 129, 0.4);
-            cursor: not-allowed;
-        }
-
-        @keyframes pulse {
-            0% { transform: scale(1); box-shadow: 0 28px 55px rgba(37, 99, 235, 0.4); }
-            50% { transform: scale(1.07); box-shadow: 0 34px 70px rgba(59, 130, 246, 0.55); }
-            100% { transform: scale(1); box-shadow: 0 28px 55px rgba(37, 99, 235, 0.4); }
-        }
-
-        .control-row {
-            display: flex;
-            gap: 12px;
-            justify-content: center;
-            width: min(280px, 100%);
-        }
-
-        .control-btn {
-            flex: 1;
-            min-width: 100px;
-            border-radius: 14px;
-            padding: 10px 14px;
-            font-weight: 600;
-            border: none;
-            cursor: pointer;
-            background: rgba(30, 41, 59, 0.82);
-            color: var(--wt-text);
-            box-shadow: 0 16px 34px rgba(5, 10, 18, 0.45);
-            transition: transform 0.2s ease, box-shadow 0.2s ease, background 0.2s ease;
-        }
-
-        .control-btn:hover {
-            transform: translateY(-2px);
-            background: rgba(37, 99, 235, 0.22);
-            box-shadow: 0 20px 40px rgba(5, 10, 18, 0.5);
-        }
-
-        .control-btn.primary {
-            background: linear-gradient(135deg, var(--wt-accent) 0%, var(--wt-highlight) 100%);
-            color: var(--wt-heading);
-        }
-
-        .status-message {
-            text-align: center;
-            font-size: 0.8rem;
-            color: var(--wt-text-muted);
-            min-height: 18px;
-        }
-
-        .transcription-card {
-            padding: 10px;
-            border-radius: 12px;
-            background: var(--wt-panel);
-            border: 1px solid var(--wt-border);
-            box-shadow: inset 0 0 0 1px rgba(59, 130, 246, 0.08);
-            flex: 1;
-            position: relative;
-            display: flex;
-            flex-direction: column;
-            gap: 5px;
-            overflow: hidden;
-            min-height: 0;
-        }
-
-        .transcription-placeholder {
-            text-align: center;
-            font-style: italic;
-            color: var(--wt-text-muted);
-            margin: auto;
-            padding: 0 12px;
-        }
-
-        .transcription-text {
-            line-height: 1.6;
-            font-size: 1rem;
-            cursor: context-menu;
-            flex: 1;
-            overflow-y: auto;
-            padding-right: 4px;
-        }
-
-        .hint {
-            margin-top: auto;
-            text-align: left;
-            font-size: 0.8rem;
-            color: var(--wt-text-muted);
-            display: flex;
-            flex-direction: row;
-            align-items: flex-end;
-            justify-content: space-between;
-            gap: 12px;
-            padding: 8px 6px 12px;
-        }
-        .hint .hint-text {
-            align-self: flex-end;
-        }
-        .hint .robot-illustration {
-            width: 150px;
-            opacity: 0.95;
-            pointer-events: none;
-        }
-
-        .alert {
-            position: absolute;
-            bottom: 20px;
-            left: 20px;
-            right: 20px;
-            padding: 14px 16px;
-            border-radius: 12px;
-            font-size: 0.9rem;
-            display: none;
-            z-index: 100;
-        }
-
-        .alert.error {
-            background: rgba(248, 113, 113, 0.12);
-            border: 1px solid rgba(248, 113, 113, 0.4);
-            color: var(--wt-danger);
-        }
-
-        .alert.success {
-            background: rgba(16, 185, 129, 0.16);
-            border: 1px solid rgba(16, 185, 129, 0.38);
-            color: var(--wt-highlight);
-        }
-
-        @media (max-width: 520px) {
-            .desk-container {
-                padding: 28px 20px;
-            }
-
-            .control-row {
-                flex-direction: column;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="desk-container">
-        <div class="desk-header">
-            <h1 class="desk-title">DeskTalk</h1>
-            <p class="desk-subtitle">Desktop voice transcription companion</p>
-        </div>
-
-        <div class="desk-body">
-            <div class="record-area">
-                <button class="record-button" id="recordButton">●</button>
-                <div class="control-row" id="controlRow" style="display: none;">
-                    <button class="control-btn" id="stopButton">Stop</button>
-                    <button class="control-btn primary" id="stopCopyButton">Stop & Copy</button>
-                </div>
-                <div class="status-message" id="statusMessage">Click the circle to start recording</div>
-            </div>
-
-            <div class="transcription-card" id="transcriptionCard">
-                <div class="transcription-placeholder" id="transcriptionPlaceholder">
-                    Your transcription will appear here.
-                </div>
-                <div class="transcription-text" id="transcriptionText" style="display: none;"></div>
-                <div class="hint">
-                    <div class="hint-text" style="flex: 1; text-align: left;">Right-click the text to copy</div>
-                    <img src="/Robot.png" class="robot-illustration" alt="Robot holding microphone">
-                </div>
-            </div>
-        </div>
-
-        <div class="alert error" id="errorMessage"></div>
-        <div class="alert success" id="successMessage"></div>
-    </div>
-
-    <script>
-        (function() {
-            const SERVER_URL = 'http://localhost:{{ config.server_port }}';
-
-            class DeskTalkRecorder {
-                constructor() {
-                    this.isRecording = false;
-                    this.mediaRecorder = null;
-                    this.audioChunks = [];
-                    this.shouldAutoCopy = false;
-                    this.stream = null;
-
-                    this.recordButton = document.getElementById('recordButton');
-                    this.controlRow = document.getElementById('controlRow');
-                    this.stopButton = document.getElementById('stopButton');
-                    this.stopCopyButton = document.getElementById('stopCopyButton');
-                    this.statusMessage = document.getElementById('statusMessage');
-                    this.transcriptionPlaceholder = document.getElementById('transcriptionPlaceholder');
-                    this.transcriptionText = document.getElementById('transcriptionText');
-                    this.transcriptionCard = document.getElementById('transcriptionCard');
-                    this.errorMessage = document.getElementById('errorMessage');
-                    this.successMessage = document.getElementById('successMessage');
-
-                    this.bindEvents();
-                }
-
-                bindEvents() {
-                    this.recordButton.addEventListener('click', () => {
-                        if (this.isRecording) {
-                            this.stopRecording();
-                        } else {
-                            this.startRecording();
-                        }
-                    });
-
-                    this.stopButton.addEventListener('click', () => this.stopRecording());
-                    this.stopCopyButton.addEventListener('click', () => {
-                        this.shouldAutoCopy = true;
-                        this.stopRecording();
-                    });
-
-                    this.transcriptionCard.addEventListener('contextmenu', (event) => {
-                        event.preventDefault();
-                        if (this.transcriptionText.style.display === 'none') {
-                            return;
-                        }
-                        this.copyTranscription();
-                    });
-                }
-
-
-                updateStatus(message) {
-                    this.statusMessage.textContent = message;
-                }
-
-                resetAlerts() {
-                    this.errorMessage.style.display = 'none';
-                    this.successMessage.style.display = 'none';
-                }
-
-                showError(message) {
-                    this.errorMessage.textContent = message;
-                    this.errorMessage.style.display = 'block';
-                    this.successMessage.style.display = 'none';
-                }
-
-                showSuccess(message) {
-                    this.successMessage.textContent = message;
-                    this.successMessage.style.display = 'block';
-                    this.errorMessage.style.display = 'none';
-                }
-
-                async startRecording() {
-                    this.resetAlerts();
-                    try {
-                        if (!this.stream) {
-                            this.stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-                        }
-
-                        this.audioChunks = [];
-                        this.mediaRecorder = new MediaRecorder(this.stream, { mimeType: 'audio/webm' });
-
-                        this.mediaRecorder.addEventListener('dataavailable', event => {
-                            if (event.data.size > 0) {
-                                this.audioChunks.push(event.data);
-                            }
-                        });
-
-                        this.mediaRecorder.addEventListener('stop', () => {
-                            this.processRecording();
-                        });
-
-                        this.mediaRecorder.start();
-                        this.isRecording = true;
-                        this.recordButton.classList.add('recording');
-                        this.recordButton.textContent = '●';
-                        this.updateStatus('Recording... speak naturally');
-                        this.controlRow.style.display = 'flex';
-                    } catch (error) {
-                        this.showError(`Could not start recording: ${error.message}`);
-                        this.updateStatus('Ready when you are');
-                        if (this.stream) {
-                            this.stream.getTracks().forEach(track => track.stop());
-                            this.stream = null;
-                        }
+                finishPcmStream() {
+                    const pcm = this.pcm;
+                    const { socket, context, source, node } = pcm;
+                    this.pcm = null;
+                    let result;
+                    if (socket.readyState === WebSocket.OPEN) {
+                        node.port.postMessage('flush');
+                        result = pcm.result;
+                    } else if (pcm.reply) {
+                        // The server already answered (with an error) and closed
+                        result = Promise.resolve(pcm.reply);
+                    } else {
+                        result = Promise.reject(new Error('Connection to the server was lost'));
                     }
+                    return result.finally(() => {
+                        source.disconnect();
+                        context.close();
+                        socket.close();
+                    });
                 }
 
                 stopRecording() {
-                    if (!this.isRecording || !this.mediaRecorder) {
+                    if (!this.isRecording) {
                         return;
                     }
 
-                    this.mediaRecorder.stop();
+                    if (this.pcm) {
+                        this.processRecording(() => this.finishPcmStream());
+                    } else {
+                        this.mediaRecorder.stop();
+                    }
                     this.isRecording = false;
                     this.recordButton.classList.remove('recording');
                     this.recordButton.classList.add('processing');
@@ -1087,26 +1551,32 @@ class WebTalkSettingsApp:
                     this.controlRow.style.display = 'none';
                 }
 
-                async processRecording() {
-                    try {
-                        const blob = new Blob(this.audioChunks, { type: 'audio/webm' });
-                        if (blob.size === 0) {
-                            throw new Error('No audio captured');
-                        }
+                async uploadRecording() {
+                    const blob = new Blob(this.audioChunks, { type: 'audio/webm' });
+                    if (blob.size === 0) {
+                        throw new Error('No audio captured');
+                    }
 
-                        const formData = new FormData();
-                        formData.append('audio', blob, 'desktop-recording.webm');
+                    const formData = new FormData();
+                    formData.append('audio', blob, 'desktop-recording.webm');
 
-                        const response = await fetch(`${SERVER_URL}/transcribe`, {
-                            method: 'POST',
-                            body: formData
-                        });
+                    const response = await fetch(`${SERVER_URL}/transcribe`, {
+                        method: 'POST',
+                        body: formData
+                    });
 
-                        if (!response.ok) {
-                            throw new Error(`Server responded with ${response.status}`);
-                        }
+                    if (!response.ok) {
+                        throw new Error(`Server responded with ${response.status}`);
+                    }
+                    return response.json();
+                }
 
-                        const data = await response.json();
+                async processRecording(getResult) {
+                    try {
+                        const data = await getResult();
+                        if (data && data.success === false) {
+                            throw new Error(data.error || 'Server error');
+                        }
                         const text = (data && data.transcription) ? data.transcription.trim() : '';
                         this.displayTranscription(text || '[No speech detected]');
                         this.updateStatus('Transcription ready');
@@ -1165,164 +1635,252 @@ class WebTalkSettingsApp:
             window.addEventListener('DOMContentLoaded', () => new DeskTalkRecorder());
         })();
     </script>
-</body>
-</html>
-"""
-
-
-    def run(self):
-        """Start the Flask app and create the webview window"""
-        # Set application user model ID early to separate from Python
-        try:
-            import ctypes
-            ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("WebTalk.SettingsApp.1.0")
-            print("Early application ID set successfully!")
-        except Exception as e:
-            print(f"Could not set early application ID: {e}")
-        
-        # Start Flask in a separate thread
-        flask_thread = threading.Thread(
-            target=lambda: self.app.run(host='127.0.0.1', port=5555, debug=False, use_reloader=False),
-            daemon=True
-        )
-        flask_thread.start()
-        
-        # Give Flask a moment to start
-        time.sleep(2)
-        
-        print("Flask server started successfully!")
-        print("Creating PyWebView window...")
-        
-        # Calculate window dimensions based on screen size
-        # Target: 90% of screen height, with max of 950px (original design height)
-        # Width stays fixed - content will adapt via flexbox
-        MAX_HEIGHT = 950
-        WINDOW_WIDTH = 550
-        
-        try:
-            # Get screen dimensions using Windows API
-            user32 = ctypes.windll.user32
-            screen_height = user32.GetSystemMetrics(1)  # SM_CYSCREEN
-            print(f"Detected screen height: {screen_height}px")
-            
-            # Calculate 90% of screen height, capped at MAX_HEIGHT
-            target_height = min(int(screen_height * 0.9), MAX_HEIGHT)
+    <script>
+        function switchTab(tabName) {
+            console.log('Switching to tab:', tabName);
             
-            print(f"Window size: {WINDOW_WIDTH}x{target_height}")
-        except Exception as e:
-            print(f"Could not get screen dimensions, using defaults: {e}")
-            target_height = MAX_HEIGHT
-        
-        # Create and start the webview window
-        try:
-            window = webview.create_window(
-                'WebTalk Server Settings',
-                'http://127.0.0.1:5555',
-                width=WINDOW_WIDTH,
-                height=target_height,
-                resizable=True,
-                shadow=True,
-                on_top=False,  # Allow window to go behind other windows
-                minimized=False,
-                background_color='#0f172a',  # Match the app background
-                js_api=None,
-                text_select=False
-            )
+            // Hide all tab contents (remove active class)
+            document.querySelectorAll('.tab-content').forEach(tab => {
+                tab.classList.remove('active');
+                console.log('Hiding tab:', tab.id);
+            });
             
-            # Set up dark title bar and icon after window is shown
-            def set_window_properties():
-                try:
-                    from webview.platforms.winforms import BrowserView
-                    import ctypes.wintypes
-                    
-                    # Get window handle
-                    window_handle = BrowserView.instances[window.uid].Handle.ToInt32()
-                    
-                    # Set application user model ID to separate from Python
-                    shell32 = ctypes.windll.shell32
-                    try:
-                        shell32.SetCurrentProcessExplicitAppUserModelID("WebTalk.SettingsApp.1.0")
-                        print("Application ID set successfully!")
-                    except:
-                        pass
-                    
-                    # Set dark title bar
-                    dwmapi = ctypes.windll.LoadLibrary("dwmapi")
-                    dwmapi.DwmSetWindowAttribute(
-                        window_handle,
-                        20,  # DWMWA_USE_IMMERSIVE_DARK_MODE
-                        ctypes.byref(ctypes.c_bool(True)),
-                        ctypes.sizeof(ctypes.wintypes.BOOL),
-                    )
-                    print("Dark title bar applied successfully!")
-                    
-                    # Set custom icon
-                    icon_path = IMAGES_DIR / "WebTalk.ico"
-                    if icon_path.exists():
-                        user32 = ctypes.windll.user32
-                        
-                        # Load icon with multiple sizes
-                        hicon_small = user32.LoadImageW(
-                            None, 
-                            str(icon_path), 
-                            1,  # IMAGE_ICON
-                            16, 16,  # Small icon size
-                            0x00000010  # LR_LOADFROMFILE
-                        )
-                        hicon_large = user32.LoadImageW(
-                            None, 
-                            str(icon_path), 
-                            1,  # IMAGE_ICON
-                            32, 32,  # Large icon size
-                            0x00000010  # LR_LOADFROMFILE
-                        )
-                        
-                        if hicon_small and hicon_large:
-                            # Set window icons
-                            user32.SendMessageW(window_handle, 0x0080, 0, hicon_small)  # WM_SETICON, ICON_SMALL
-                            user32.SendMessageW(window_handle, 0x0080, 1, hicon_large)  # WM_SETICON, ICON_BIG
-                            
-                            # Set class icon for taskbar
-                            user32.SetClassLongPtrW(window_handle, -14, hicon_small)  # GCL_HICONSM
-                            user32.SetClassLongPtrW(window_handle, -34, hicon_large)  # GCL_HICON
-                            
-                            # Additional method: Set process icon
-                            kernel32 = ctypes.windll.kernel32
-                            process_handle = kernel32.GetCurrentProcess()
-                            
-                            # Force taskbar to update
-                            user32.SetWindowPos(window_handle, 0, 0, 0, 0, 0, 0x0020 | 0x0004 | 0x0001)  # SWP_FRAMECHANGED | SWP_NOZORDER | SWP_NOSIZE
-                            
-                            print("Custom icon applied successfully!")
-                        else:
-                            print("Failed to load icon file")
-                    else:
-                        print(f"Icon file not found: {icon_path}")
-                        
-                except Exception as e:
-                    print(f"Could not apply window properties: {e}")
+            // Remove active class from all tab buttons
+            document.querySelectorAll('.tab-button').forEach(btn => {
+                btn.classList.remove('active');
+            });
             
-            # Apply window properties when window is shown
-            window.events.shown += set_window_properties
+            // Show selected tab content (add active class)
+            const targetTab = document.getElementById(tabName + '-tab');
+            if (targetTab) {
+                targetTab.classList.add('active');
+                console.log('Showing tab:', targetTab.id);
+            } else {
+                console.error('Tab not found:', tabName + '-tab');
+            }
             
-            print("Starting PyWebView...")
-            webview.start(debug=False, private_mode=False)  # Disable debug to prevent DevTools window
-            print("PyWebView window closed.")
-        except Exception as e:
-            print(f"Error starting webview: {e}")
-            print("Flask server is running at http://127.0.0.1:5555")
-            print("You can open this URL in your browser as a fallback.")
-            # Keep the Flask server running
-            try:
-                while True:
-                    time.sleep(1)
-            except KeyboardInterrupt:
-                print("Settings app stopped.")
+            // Add active class to clicked button
+            const targetButton = document.querySelector('.tab-button[data-tab="' + tabName + '"]');
+            if (targetButton) {
+                targetButton.classList.add('active');
+            }
+            console.log('Tab switch completed');
+        }
+
+        window.switchTab = switchTab;
+
+        function initializeTabs() {
+            console.log('Initializing tab interface');
+
+            // Set up tab button click handlers
+            const tabButtons = document.querySelectorAll('.tab-button');
+            if (tabButtons.length) {
+                tabButtons.forEach(btn => {
+                    const target = btn.getAttribute('data-tab');
+                    if (target) {
+                        btn.addEventListener('click', () => switchTab(target));
+                        btn.setAttribute('role', 'tab');
+                    }
+                });
+
+                // Switch to the default tab (DeskTalk)
+                const defaultTab = tabButtons[0].getAttribute('data-tab') || 'desktalk';
+                switchTab(defaultTab);
+                console.log('Default tab activated:', defaultTab);
+            }
+        }
+
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', initializeTabs);
+        } else {
+            initializeTabs();
+        }
+
+        const saveButton = document.getElementById('save-apply-button');
+        const restartAlert = document.getElementById('restart-alert');
+        const inputs = document.querySelectorAll('.input-field, .select-field, #compute-engine-toggle');
+        
+        let initialValues = {};
+        const dirtyFields = new Set();
+        const snapshotValues = () => {
+            inputs.forEach(input => {
+                if (input.type === 'checkbox') {
+                    initialValues[input.id] = input.checked;
+                } else {
+                    initialValues[input.id] = input.value;
+                }
+            });
+            dirtyFields.clear();
+        };
+
+        // Inside the desktop window the Python side is called directly through
+        // pywebview's js_api; in a plain browser the same calls go over HTTP
+        const pywebviewApi = new Promise(resolve => {
+            if (window.pywebview && window.pywebview.api) {
+                resolve(window.pywebview.api);
+                return;
+            }
+            window.addEventListener('pywebviewready', () => resolve(window.pywebview.api));
+            setTimeout(() => resolve(null), 300);
+        });
+        const callApi = async (name, args, fallback) => {
+            const api = await pywebviewApi;
+            return api ? api[name](...args) : fallback();
+        };
+
+        // The toggle only picks GPU or CPU; an engine set outside this form
+        // (faster-whisper, onnx-cuda, the int8 variants) is kept unless the
+        // user actually flips it
+        const CPU_ENGINES = ['cpu', 'cpu-int8'];
+        let loadedEngine = 'gpu';
+        const engineRunsOnGpu = engine => !CPU_ENGINES.includes(engine);
+
+        // The page is served static; fill the form from the live config
+        const hydrateSettings = async () => {
+            try {
+                const { config, microphones } = await callApi('bootstrap', [],
+                    () => fetch('/api/bootstrap').then(r => r.json()));
+                window.dispatchEvent(new CustomEvent('webtalk:config', { detail: config }));
+                loadedEngine = config.compute_engine || 'gpu';
+                document.getElementById('compute-engine-toggle').checked = engineRunsOnGpu(loadedEngine);
+                document.getElementById('model-selector').value = config.model;
+                fillMicrophones(microphones, config.microphone);
+            } catch (error) {
+                console.error('Could not load settings:', error);
+            }
+            snapshotValues();
+        };
+
+        const micSelector = document.getElementById('microphone-selector');
+        let micListJson = '';
+        const fillMicrophones = (microphones, selected) => {
+            const json = JSON.stringify(microphones);
+            if (json === micListJson) {
+                return;
+            }
+            micListJson = json;
+            micSelector.innerHTML = '';
+            microphones.forEach(mic => {
+                micSelector.add(new Option(mic.label, mic.value, false, mic.value === selected));
+            });
+        };
+
+        // Re-enumerate devices only when the user goes to pick one
+        micSelector.addEventListener('focus', async () => {
+            try {
+                const microphones = await callApi('get_microphones', [true],
+                    () => fetch('/api/microphones?refresh=1').then(r => r.json()));
+                fillMicrophones(microphones, micSelector.value);
+            } catch (error) {
+                console.error('Could not refresh microphones:', error);
+            }
+        });
+
+        snapshotValues();
+        hydrateSettings();
+
+        const checkForChanges = () => {
+            let changed = false;
+            inputs.forEach(input => {
+                const currentValue = input.type === 'checkbox' ? input.checked : input.value;
+                if (currentValue !== initialValues[input.id]) {
+                    changed = true;
+                }
+            });
+            return changed;
+        };
+
+        const saveSettings = async () => {
+            try {
+                const computeToggle = document.getElementById('compute-engine-toggle');
+                const data = {
+                    compute_engine: computeToggle.checked === engineRunsOnGpu(loadedEngine)
+                        ? loadedEngine
+                        : (computeToggle.checked ? 'gpu' : 'cpu'),
+                    model: document.getElementById('model-selector').value,
+                    microphone: document.getElementById('microphone-selector').value
+                };
+                
+                console.log('Toggle checked:', computeToggle.checked);
+                console.log('Compute engine:', data.compute_engine);
+                console.log('Saving configuration:', data);
+
+                const result = await callApi('save_settings', [data], () => fetch('/api/config', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify(data)
+                }).then(r => r.json()));
+                
+                if (result.success) {
+                    loadedEngine = data.compute_engine;
+                    if (checkForChanges() || result.server_status !== 'running') {
+                        restartAlert.style.display = 'block';
+                        restartAlert.innerHTML = '<span class="material-icons text-sm mr-1 align-middle">warning</span> Restart server for changes to take effect.';
+                    } else {
+                        restartAlert.style.display = 'block';
+                        restartAlert.innerHTML = '<span class="material-icons text-sm mr-1 align-middle">check_circle</span> Settings saved successfully!';
+                        restartAlert.style.color = '#34D399';
+                    }
+                    
+                    // Update initial values
+                    snapshotValues();
+                } else {
+                    alert('Error saving settings: ' + result.message);
+                }
+            } catch (error) {
+                alert('Error saving settings: ' + error.message);
+            }
+        };
+
+        // Coalesce rapid clicks: while a save is in flight, further clicks
+        // just request one more save once the current one has finished
+        let saveInFlight = false;
+        let savePending = false;
+        saveButton.addEventListener('click', async () => {
+            if (saveInFlight) {
+                savePending = true;
+                return;
+            }
+            saveInFlight = true;
+            try {
+                do {
+                    savePending = false;
+                    await saveSettings();
+                } while (savePending);
+            } finally {
+                saveInFlight = false;
+            }
+        });
+
+        // One delegated listener for every field: only the field that changed
+        // is compared, and the alert hides once no field differs any more
+        document.getElementById('settings-tab').addEventListener('change', event => {
+            const field = event.target;
+            if (!(field.id in initialValues)) {
+                return;
+            }
+            const value = field.type === 'checkbox' ? field.checked : field.value;
+            if (value !== initialValues[field.id]) {
+                dirtyFields.add(field.id);
+                restartAlert.style.display = 'block';
+            } else {
+                dirtyFields.delete(field.id);
+                if (dirtyFields.size === 0) {
+                    restartAlert.style.display = 'none';
+                }
+            }
+        }, { passive: true });
+</script>
+</body>
+</html>
+'''
 
 def main():
     """Main entry point"""
-    app = WebTalkSettingsApp()
-    app.run()
+    settings_app = WebTalkSettingsApp()
+    settings_app.run()
 
 if __name__ == "__main__":
     main() 
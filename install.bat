@@ -29,8 +29,8 @@ call whisper_env\Scripts\activate.bat
 echo Installing dependencies...
 pip install torch torchaudio --index-url https://download.pytorch.org/whl/cu118
 pip install openai-whisper
-pip install fastapi uvicorn python-multipart requests pydantic
-pip install flask pywebview
+pip install fastapi "uvicorn[standard]" python-multipart blake3 requests pydantic orjson
+pip install flask pywebview waitress
 
 echo.
 echo Testing installation...